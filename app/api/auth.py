@@ -6,8 +6,13 @@ from sqlalchemy.orm import Session
 from app.auth import authenticate_user, create_access_token, get_current_admin_user
 from app.config import settings
 from app.database import get_db
-from app.models.user import User
-from app.schemas import GetTokenSchema, Token, UserCreate, UserResponse
+from app.schemas import (
+    GetTokenSchema,
+    Token,
+    UserCreate,
+    UserPrincipal,
+    UserResponse,
+)
 from app.services.user_service import UserService
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -39,7 +44,7 @@ async def login(
 async def register(
     user: UserCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ) -> UserResponse:
     """Регистрация нового пользователя (только для администраторов)"""
     user_service = UserService(db)
@@ -1,19 +1,22 @@
 from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import verify_api_key
-from app.database import get_db
+from app.config import settings
+from app.database import get_async_db
 from app.schemas import LeadCreate, LeadCreateExternal, LeadResponse
-from app.services.lead_service import LeadService
+from app.services.lead_ingest_queue import lead_ingest_queue
+from app.services.lead_service import AsyncLeadService
 
 router = APIRouter(prefix="/api/v1", tags=["external"])
 
 
 async def verify_api_key_header(
-    x_api_key: str = Header(..., alias="X-API-Key"), db: Session = Depends(get_db)
+    x_api_key: str = Header(..., alias="X-API-Key"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Проверка API ключа из заголовка"""
-    project = verify_api_key(x_api_key, db)
+    project = await verify_api_key(x_api_key, db)
     if project is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -27,7 +30,7 @@ async def create_lead_external(
     lead_data: LeadCreateExternal,
     request: Request,
     project=Depends(verify_api_key_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Прием заявки через внешний API"""
     # Создаем заявку для проекта
@@ -50,18 +53,26 @@ async def create_lead_external(
     user_agent = request.headers.get("user-agent")
     referrer = request.headers.get("referer")
 
-    # Создаем заявку через сервис
-    lead_service = LeadService(db)
-    lead = lead_service.create_lead(
-        lead=lead_create,
-        ip_address=ip_address,
-        user_agent=user_agent,
-        referrer=referrer,
-    )
-
-    # TODO: Здесь будет асинхронная отправка вебхука
-    # await send_webhook_async.delay(project.id, lead.id)
+    # Создаем заявку через очередь пакетной записи или напрямую через сервис
+    if settings.lead_ingest_batching:
+        lead = await lead_ingest_queue.submit(
+            lead=lead_create,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            referrer=referrer,
+            notify_webhook=bool(project.webhook_url),
+        )
+    else:
+        lead_service = AsyncLeadService(db)
+        lead = await lead_service.ingest_lead(
+            lead=lead_create,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            referrer=referrer,
+            notify_webhook=bool(project.webhook_url),
+        )
 
+    # Вебхук отправит relay_webhook_outbox по событию из webhook_outbox
     return lead
 
 
@@ -1,27 +1,88 @@
-from typing import List, Optional
+from typing import List, Optional, Set
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_active_user
-from app.database import get_db
-from app.models import User
+from app.database import get_async_db, get_db, get_primary_db
 from app.models.enums import LeadStatus
 from app.schemas import (
     DashboardStats,
+    LeadBulkUpdate,
+    LeadBulkUpdateResult,
     LeadCommentCreate,
     LeadCommentResponse,
     LeadCreate,
     LeadDetailResponse,
+    LeadExport,
     LeadFilter,
+    LeadImportResult,
+    LeadPage,
     LeadResponse,
     LeadUpdate,
+    UserPrincipal,
+)
+from app.services.lead_export import MEDIA_TYPES, LeadExportService
+from app.services.lead_import import LeadImportService
+from app.services.lead_service import (
+    AsyncLeadService,
+    LeadService,
+    LeadVersionConflict,
 )
-from app.services.lead_service import LeadService
 
 router = APIRouter(prefix="/leads", tags=["leads"])
 
 
+def lead_etag(version: int) -> str:
+    """ETag заявки по ее версии"""
+    return f'"{version}"'
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[Set[int]]:
+    """Версии заявки из заголовка If-Match
+
+    None - условия нет (заголовка нет или "*"). If-Match сравнивает
+    метки строго (RFC 9110), поэтому слабые метки W/"..." и
+    нераспознанные метки не совпадают ни с одной версией.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            continue
+        tag = tag.strip('"')
+        if tag.isdigit():
+            versions.add(int(tag))
+    return versions
+
+
+def version_conflict(if_match: Optional[str], error: LeadVersionConflict):
+    """412 при невыполненном If-Match, 409 при гонке без условия"""
+    return HTTPException(
+        status_code=(
+            status.HTTP_412_PRECONDITION_FAILED
+            if if_match is not None
+            else status.HTTP_409_CONFLICT
+        ),
+        detail=str(error),
+    )
+
+
 @router.get("/", response_model=List[LeadResponse])
 async def get_leads(
     project_id: int = None,
@@ -31,8 +92,8 @@ async def get_leads(
     search: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Получение списка заявок с фильтрацией"""
     # Создаем фильтр
@@ -44,22 +105,123 @@ async def get_leads(
         search=search,
     )
 
-    lead_service = LeadService(db)
-    leads = lead_service.get_leads(
+    lead_service = AsyncLeadService(db)
+    leads = await lead_service.get_leads(
         filters=filters, skip=skip, limit=limit, user=current_user
     )
     return leads
 
 
+@router.get("/page", response_model=LeadPage)
+async def get_leads_page(
+    project_id: int = None,
+    status: Optional[str] = None,
+    assigned_to: int = None,
+    priority: int = None,
+    search: str = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+):
+    """Получение списка заявок с пагинацией по курсору
+
+    Заявки отдаются от новых к старым. Для следующей страницы передайте
+    next_cursor из предыдущего ответа.
+    """
+    filters = LeadFilter(
+        project_id=project_id,
+        status=status,
+        assigned_to=assigned_to,
+        priority=priority,
+        search=search,
+    )
+
+    lead_service = AsyncLeadService(db)
+    try:
+        return await lead_service.get_leads_page(
+            filters=filters, cursor=cursor, limit=limit, user=current_user
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/export")
+async def export_leads(
+    export: LeadExport,
+    current_user: UserPrincipal = Depends(get_current_active_user),
+):
+    """Выгрузка заявок в CSV или XLSX
+
+    Файл отдается потоком по мере чтения заявок из базы.
+    """
+    content = LeadExportService().export(export, user=current_user)
+    filename = f"leads.{export.format}"
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[export.format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import", response_model=LeadImportResult)
+def import_leads(
+    project_id: int,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+):
+    """Импорт заявок в проект из CSV или NDJSON
+
+    Строки с ошибками пропускаются и возвращаются в errors, остальные
+    сохраняются пачками по отдельным транзакциям. Если пачку сохранить
+    не удалось, импорт останавливается: ранее сохраненные пачки
+    остаются (их число строк - в imported), причина - в error.
+    Обработчик синхронный: импорт большого файла выполняется в пуле
+    потоков и не блокирует event loop.
+    """
+    lead_service = LeadImportService(db)
+    try:
+        return lead_service.import_leads(
+            project_id=project_id, file=file.file, format=format, user=current_user
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/bulk-update", response_model=LeadBulkUpdateResult)
+def bulk_update_leads(
+    bulk: LeadBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_current_active_user),
+):
+    """Массовое изменение ответственного, приоритета или статуса заявок
+
+    Обработчик синхронный: изменение тысяч заявок выполняется в пуле
+    потоков и не блокирует event loop.
+    """
+    lead_service = LeadService(db)
+    try:
+        return lead_service.bulk_update_leads(bulk=bulk, user=current_user)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{lead_id}", response_model=LeadDetailResponse)
 async def get_lead(
     lead_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    response: Response,
+    db: Session = Depends(get_primary_db),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
-    """Получение детальной информации о заявке"""
+    """Получение детальной информации о заявке
+
+    ETag ответа - версия заявки, ее передают в If-Match при изменении.
+    Читается с основной базы, как и проверка If-Match, а не с реплики.
+    """
     lead_service = LeadService(db)
-    lead = lead_service.get_lead(lead_id=lead_id)
+    lead = lead_service.get_lead_detail(lead_id=lead_id)
     if lead is None:
         raise HTTPException(status_code=404, detail="Заявка не найдена")
 
@@ -70,6 +232,7 @@ async def get_lead(
             detail="Недостаточно прав доступа к заявке",
         )
 
+    response.headers["ETag"] = lead_etag(lead.version)
     return lead
 
 
@@ -78,7 +241,7 @@ async def create_lead(
     lead: LeadCreate,
     request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Создание новой заявки"""
     # Получаем IP и User-Agent
@@ -103,41 +266,63 @@ async def create_lead(
 async def update_lead(
     lead_id: int,
     lead_update: LeadUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
-    """Обновление заявки"""
+    """Обновление заявки
+
+    С заголовком If-Match (ETag из GET) заявка меняется, только если ее
+    версия не изменилась, иначе 412. Новая версия возвращается в ETag.
+    """
     lead_service = LeadService(db)
     try:
-        return lead_service.update_lead(
-            lead_id=lead_id, lead_update=lead_update, user=current_user
+        lead = lead_service.update_lead(
+            lead_id=lead_id,
+            lead_update=lead_update,
+            user=current_user,
+            expected_versions=parse_if_match(if_match),
         )
+    except LeadVersionConflict as e:
+        raise version_conflict(if_match, e)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    response.headers["ETag"] = lead_etag(lead.version)
+    return lead
 
 
 @router.put("/{lead_id}/status", response_model=LeadResponse)
 async def update_lead_status(
     lead_id: int,
     new_status: LeadStatus,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
-    """Обновление заявки"""
+    """Обновление статуса заявки (If-Match - как в PUT /leads/{lead_id})"""
     lead_service = LeadService(db)
     try:
-        return lead_service.update_lead(
-            lead_id=lead_id, lead_update=new_status, user=current_user
+        lead = lead_service.update_lead_status(
+            lead_id=lead_id,
+            new_status=new_status,
+            user=current_user,
+            expected_versions=parse_if_match(if_match),
         )
+    except LeadVersionConflict as e:
+        raise version_conflict(if_match, e)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    response.headers["ETag"] = lead_etag(lead.version)
+    return lead
 
 
 @router.delete("/{lead_id}")
 async def delete_lead(
     lead_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Удаление заявки"""
     lead_service = LeadService(db)
@@ -146,6 +331,8 @@ async def delete_lead(
         if not success:
             raise HTTPException(status_code=404, detail="Заявка не найдена")
         return {"message": "Заявка успешно удалена"}
+    except LeadVersionConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -155,7 +342,7 @@ async def add_comment(
     lead_id: int,
     comment_data: LeadCommentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Добавление комментария к заявке"""
     lead_service = LeadService(db)
@@ -170,13 +357,13 @@ async def add_comment(
 @router.get("/stats/dashboard", response_model=DashboardStats)
 async def get_dashboard_stats(
     project_id: int = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Получение статистики для дашборда"""
-    lead_service = LeadService(db)
+    lead_service = AsyncLeadService(db)
     try:
-        return lead_service.get_dashboard_stats(
+        return await lead_service.get_dashboard_stats(
             project_id=project_id, user=current_user
         )
     except ValueError as e:
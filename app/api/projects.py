@@ -5,12 +5,12 @@ from sqlalchemy.orm import Session
 
 from app.auth import get_current_active_user, get_current_admin_user
 from app.database import get_db
-from app.models import Project, User
 from app.schemas import (
     ProjectCreate,
     ProjectResponse,
     ProjectUpdate,
     ProjectUserAssignment,
+    UserPrincipal,
     UserResponse,
 )
 from app.services.project_service import ProjectService
@@ -23,32 +23,18 @@ async def get_projects(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Получение списка проектов"""
     project_service = ProjectService(db)
-    projects: list[Project] = project_service.get_user_projects(current_user)
-
-    return [
-        ProjectResponse(
-            id=project.id,
-            name=project.name,
-            description=project.description,
-            api_key=project.api_key,
-            is_active=project.is_active,
-            created_at=project.created_at,
-            updated_at=project.updated_at,
-            leads_count=len(project.leads),
-        )
-        for project in projects
-    ]
+    return project_service.get_user_projects(current_user, skip=skip, limit=limit)
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Получение информации о проекте"""
     project_service = ProjectService(db)
@@ -70,7 +56,7 @@ async def get_project(
 async def create_project(
     project: ProjectCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """Создание нового проекта (только для администраторов)"""
     project_service = ProjectService(db)
@@ -82,7 +68,7 @@ async def update_project(
     project_id: int,
     project_update: ProjectUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """Обновление проекта (только для администраторов)"""
     project_service = ProjectService(db)
@@ -98,7 +84,7 @@ async def update_project(
 async def delete_project(
     project_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """Удаление проекта (только для администраторов)"""
     project_service = ProjectService(db)
@@ -114,7 +100,7 @@ async def assign_user_to_project(
     project_id: int,
     assignment: ProjectUserAssignment,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """Назначение пользователя на проект (только для администраторов)"""
     project_service = ProjectService(db)
@@ -143,7 +129,7 @@ async def remove_user_from_project(
     project_id: int,
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """Удаление пользователя из проекта (только для администраторов)"""
     project_service = ProjectService(db)
@@ -162,7 +148,7 @@ async def remove_user_from_project(
 async def get_project_users(
     project_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Получение списка пользователей проекта"""
     project_service = ProjectService(db)
@@ -6,8 +6,7 @@ from sqlalchemy.orm import Session
 
 from app.auth import get_current_active_user, get_current_admin_user
 from app.database import get_db
-from app.models import User
-from app.schemas import UserCreate, UserResponse, UserUpdate
+from app.schemas import UserCreate, UserPrincipal, UserResponse, UserUpdate
 from app.services.user_service import UserService
 
 logger = logging.getLogger("api")
@@ -19,7 +18,7 @@ async def get_users(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """Получение списка пользователей (только для администраторов)"""
     user_service = UserService(db)
@@ -31,7 +30,7 @@ async def get_users(
 async def get_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Получение информации о пользователе"""
     # Пользователи могут видеть только свою информацию, админы - всех
@@ -51,7 +50,7 @@ async def get_user(
 async def create_user(
     user: UserCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """Создание нового пользователя (только для администраторов)"""
     user_service = UserService(db)
@@ -66,7 +65,7 @@ async def update_user(
     user_id: int,
     user_update: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserPrincipal = Depends(get_current_active_user),
 ):
     """Обновление информации о пользователе"""
     # Пользователи могут обновлять только свою информацию, админы - всех
@@ -86,7 +85,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: UserPrincipal = Depends(get_current_admin_user),
 ):
     """Удаление пользователя (только для администраторов)"""
     if current_user.id == user_id:
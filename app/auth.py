@@ -5,12 +5,15 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.cache import CachedProject, principal_cache, project_cache
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.models.enums import UserRole
+from app.schemas.users import UserPrincipal
 
 # Настройка шифрования паролей
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
@@ -59,10 +62,14 @@ def verify_token(token: str) -> Optional[dict]:
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """Получение текущего пользователя из токена"""
-    from app.repositories.user_repository import UserRepository
+    db: AsyncSession = Depends(get_async_db),
+) -> UserPrincipal:
+    """Получение текущего пользователя из токена
+
+    Данные пользователя кэшируются по subject токена на короткий TTL,
+    изменения пользователя и его назначений сбрасывают запись.
+    """
+    from app.repositories.user_repository import AsyncUserRepository
 
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -78,17 +85,30 @@ async def get_current_user(
     if email is None:
         raise credentials_exception
 
-    user_repository = UserRepository()
-    user = user_repository.get_user_by_email(db, email)
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+
+    user_repository = AsyncUserRepository()
+    user = await user_repository.get_user_by_email(db, email)
     if user is None:
         raise credentials_exception
 
-    return user
+    principal = UserPrincipal(
+        id=user.id,
+        email=user.email,
+        username=user.username,
+        role=user.role,
+        is_active=user.is_active,
+        project_ids=frozenset(await user_repository.get_user_project_ids(db, user.id)),
+    )
+    principal_cache.set(email, principal)
+    return principal
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_user),
+) -> UserPrincipal:
     """Получение активного пользователя"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Неактивный пользователь")
@@ -96,8 +116,8 @@ async def get_current_active_user(
 
 
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+    current_user: UserPrincipal = Depends(get_current_active_user),
+) -> UserPrincipal:
     """Получение пользователя с правами администратора"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -106,14 +126,22 @@ async def get_current_admin_user(
     return current_user
 
 
-def verify_api_key(api_key: str, db: Session):
+async def verify_api_key(api_key: str, db: AsyncSession) -> Optional[CachedProject]:
     """Проверка API ключа для внешних запросов"""
-    from app.repositories.project_repository import ProjectRepository
+    from app.repositories.project_repository import AsyncProjectRepository
 
-    project_repository = ProjectRepository()
-    project = project_repository.get_project_by_api_key(db, api_key)
+    cached = project_cache.get(api_key)
+    if cached is not None:
+        return cached
+
+    project_repository = AsyncProjectRepository()
+    project = await project_repository.get_project_by_api_key(db, api_key)
     if project and project.is_active:
-        return project
+        cached = CachedProject(
+            id=project.id, name=project.name, webhook_url=project.webhook_url
+        )
+        project_cache.set(api_key, cached)
+        return cached
     return None
 
 
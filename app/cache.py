@@ -0,0 +1,105 @@
+"""Внутрипроцессные кэши"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.config import settings
+
+
+class TTLCache:
+    """LRU кэш с ограничением времени жизни записей
+
+    Кэш живет в памяти процесса, поэтому при нескольких воркерах
+    инвалидация действует только в текущем процессе, а в остальных
+    запись устаревает по TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Получить значение по ключу или None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохранить значение по ключу"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удалить значение по ключу"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> None:
+        """Удалить все значения, для которых predicate вернул True"""
+        with self._lock:
+            for key in [k for k, (_, v) in self._data.items() if predicate(v)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики попаданий и промахов"""
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+@dataclass(frozen=True)
+class CachedProject:
+    """Снимок активного проекта для приема заявок по API ключу"""
+
+    id: int
+    name: str
+    webhook_url: Optional[str] = None
+
+
+# Активные проекты по API ключу
+project_cache = TTLCache(
+    maxsize=settings.api_key_cache_size, ttl=settings.api_key_cache_ttl
+)
+
+# Аутентифицированные пользователи по subject JWT токена (email)
+principal_cache = TTLCache(
+    maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl
+)
+
+
+def evict_user_principal(user_id: int) -> None:
+    """Сбросить закэшированные данные пользователя"""
+    principal_cache.invalidate_where(lambda principal: principal.id == user_id)
+
+
+def evict_project_principals(project_id: int) -> None:
+    """Сбросить закэшированных пользователей, назначенных на проект"""
+    principal_cache.invalidate_where(
+        lambda principal: project_id in principal.project_ids
+    )
@@ -21,4 +21,11 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 минут
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    beat_schedule={
+        # Передача событий вебхуков из webhook_outbox в очередь
+        "relay-webhook-outbox": {
+            "task": "app.tasks.relay_webhook_outbox",
+            "schedule": settings.webhook_outbox_relay_interval,
+        },
+    },
 )
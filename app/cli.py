@@ -2,6 +2,8 @@
 
 import uvicorn
 from app.config import settings
+from app.database import SessionLocal
+from app.repositories.rollup_repository import LeadRollupRepository
 
 
 def start_server():
@@ -14,6 +16,15 @@ def start_server():
     )
 
 
+def rebuild_lead_rollup():
+    """Пересчет счетчиков lead_daily_rollup по всем заявкам"""
+    db = SessionLocal()
+    try:
+        rows = LeadRollupRepository.rebuild(db)
+    finally:
+        db.close()
+    print(f"Счетчики заявок пересчитаны: {rows} строк")
+
+
 if __name__ == "__main__":
     start_server()
-
@@ -12,6 +12,55 @@ class Settings(BaseSettings):
     
     # База данных
     database_url: str = "sqlite:///./quicklead.db"
+    # URL для асинхронного движка, по умолчанию выводится из database_url
+    # (sqlite+aiosqlite, postgresql+asyncpg)
+    async_database_url: Optional[str] = None
+    # Реплика только для чтения: на нее уходят GET запросы API
+    database_read_url: Optional[str] = None
+    
+    # Пул подключений (PostgreSQL)
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_recycle: int = 1800  # секунды
+    database_pool_pre_ping: bool = True
+    
+    # Профиль SQLite (PRAGMA при каждом подключении)
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 268435456  # 256 МБ
+    sqlite_cache_size: int = -65536  # отрицательное значение - в КБ (64 МБ)
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_busy_timeout: int = 5000  # мс
+    
+    # Пакетный прием заявок внешнего API (group commit)
+    lead_ingest_batching: bool = False
+    lead_ingest_batch_window_ms: int = 5
+    lead_ingest_batch_size: int = 200
+    
+    # Поиск заявок по полнотекстовому индексу (FTS5 в SQLite, pg_trgm в PostgreSQL)
+    lead_search_fts: bool = True
+    
+    # Статистика дашборда из счетчиков lead_daily_rollup
+    lead_stats_from_rollup: bool = True
+    
+    # Выгрузка заявок: сколько строк читать из курсора за раз
+    lead_export_batch_size: int = 1000
+    
+    # Импорт заявок: размер пачки (проверка и вставка) и сколько ошибок
+    # строк возвращать в ответе
+    lead_import_chunk_size: int = 5000
+    lead_import_max_errors: int = 1000
+    
+    # Массовое изменение заявок: сколько заявок можно изменить за запрос
+    lead_bulk_update_max: int = 10000
+    
+    # Кэш проектов по API ключу
+    api_key_cache_ttl: int = 300
+    api_key_cache_size: int = 1024
+    
+    # Кэш аутентифицированных пользователей
+    principal_cache_ttl: int = 30
+    principal_cache_size: int = 4096
     
     # JWT настройки
     access_token_expire_minutes: int = 30
@@ -23,6 +72,24 @@ class Settings(BaseSettings):
     # Настройки вебхуков
     webhook_timeout: int = 30
     webhook_retry_attempts: int = 3
+    # Пул подключений процесса воркера (keep-alive, HTTP/2 при наличии h2)
+    webhook_http2: bool = True
+    webhook_max_connections: int = 100
+    webhook_max_keepalive_connections: int = 20
+    webhook_keepalive_expiry: float = 60.0
+    # Режим отправки: "task" - задача на заявку, "async" - пачками в event loop
+    webhook_dispatch_mode: str = "task"
+    webhook_dispatch_batch_size: int = 100
+    webhook_max_in_flight: int = 100
+    webhook_max_in_flight_per_host: int = 8
+    # Relay событий из webhook_outbox (celery beat)
+    webhook_outbox_relay_interval: float = 2.0  # секунды
+    webhook_outbox_batch_size: int = 500
+    webhook_outbox_max_batches: int = 20
+    # Хранение логов: предел ответа получателя (символы, 0 - без предела),
+    # сжатие payload в webhook_payloads
+    webhook_log_body_max_chars: int = 2000
+    webhook_log_compress: bool = True
     
     # Telegram Bot (опционально)
     telegram_bot_token: Optional[str] = None
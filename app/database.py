@@ -1,4 +1,9 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import Engine, create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from app.config import settings
@@ -9,23 +14,161 @@ class Base(DeclarativeBase):
     pass
 
 
+# Методы запросов, которые можно обслуживать с реплики
+READ_METHODS = {"GET", "HEAD"}
+
+
+def get_engine_options(url: str) -> Dict[str, Any]:
+    """Параметры пула подключений для движка
+
+    У SQLite свой пул без сетевых подключений, поэтому настройки пула
+    применяются только к серверным базам (PostgreSQL).
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Настроить подключение SQLite по профилю из настроек
+
+    WAL позволяет читать параллельно с записью, synchronous=NORMAL в WAL
+    не делает fsync на каждый commit, busy_timeout заставляет писателя
+    ждать блокировку вместо ошибки "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+        cursor.execute(f"PRAGMA temp_store={settings.sqlite_temp_store}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+    finally:
+        cursor.close()
+
+
+def setup_sqlite(engine: Engine) -> None:
+    """Подключить профиль SQLite к движку"""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+
+
+def build_engine(url: str) -> Engine:
+    """Создать синхронный движок"""
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {},
+        echo=False,  # Установите True для отладки SQL запросов
+        **get_engine_options(url),
+    )
+    setup_sqlite(engine)
+    return engine
+
+
 # Создание движка базы данных
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False}
-    if "sqlite" in settings.database_url
-    else {},
-    echo=False,  # Установите True для отладки SQL запросов
-)
+engine = build_engine(settings.database_url)
 
 # Создание фабрики сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Реплика только для чтения (необязательная)
+read_engine: Optional[Engine] = (
+    build_engine(settings.database_read_url) if settings.database_read_url else None
+)
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    if read_engine is not None
+    else SessionLocal
+)
+
+
+# Асинхронные драйверы для синхронных URL базы данных
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
 
-def get_db():
-    """Dependency для получения сессии базы данных"""
+def to_async_url(database_url: str) -> str:
+    """URL базы данных с асинхронным драйвером"""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"Нет асинхронного драйвера для {url.drivername}")
+    return url.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def get_async_database_url() -> str:
+    """URL базы данных для асинхронного движка"""
+    if settings.async_database_url:
+        return settings.async_database_url
+    return to_async_url(settings.database_url)
+
+
+def build_async_engine(url: str):
+    """Создать асинхронный движок"""
+    async_engine = create_async_engine(url, echo=False, **get_engine_options(url))
+    setup_sqlite(async_engine.sync_engine)
+    return async_engine
+
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker(read: bool = False) -> async_sessionmaker[AsyncSession]:
+    """Фабрика асинхронных сессий (read=True - реплика, если настроена)
+
+    Асинхронный движок создается при первом обращении, поэтому процессам
+    без async роутеров (воркеры Celery, CLI) асинхронный драйвер
+    (asyncpg для PostgreSQL) не нужен. Объекты не истекают после commit,
+    чтобы их можно было сериализовать без ленивой загрузки.
+    """
+    if read and not settings.database_read_url:
+        return get_async_sessionmaker()
+    url = to_async_url(settings.database_read_url) if read else get_async_database_url()
+    return async_sessionmaker(
+        build_async_engine(url),
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def get_db(request: Request):
+    """Dependency для получения сессии базы данных
+
+    GET и HEAD запросы обслуживаются с реплики, если она настроена.
+    """
+    session_factory = (
+        ReadSessionLocal if request.method in READ_METHODS else SessionLocal
+    )
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_primary_db():
+    """Dependency для сессии основной базы независимо от метода запроса
+
+    Для чтений, результат которых сверяется с записью: ETag заявки
+    проверяется в If-Match на основной базе, и чтение с отстающей
+    реплики дало бы ложный 412.
+    """
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db(request: Request):
+    """Dependency для получения асинхронной сессии базы данных
+
+    GET и HEAD запросы обслуживаются с реплики, если она настроена.
+    """
+    session_factory = get_async_sessionmaker(read=request.method in READ_METHODS)
+    async with session_factory() as db:
+        yield db
@@ -8,8 +8,11 @@ from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.api import auth, external, leads, projects, users
+from app.cache import principal_cache, project_cache
 from app.config import settings
-from app.database import Base, engine
+from app.database import Base, SessionLocal, engine
+from app.repositories.lead_search import LeadSearchIndex
+from app.services.lead_ingest_queue import lead_ingest_queue
 
 
 # Создаем таблицы при запуске
@@ -17,9 +20,13 @@ from app.database import Base, engine
 async def lifespan(app: FastAPI):
     # Startup
     Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        LeadSearchIndex.ensure_index(db)
+    if settings.lead_ingest_batching:
+        await lead_ingest_queue.start()
     yield
     # Shutdown
-    pass
+    await lead_ingest_queue.stop()
 
 
 # Создание приложения FastAPI
@@ -188,11 +195,22 @@ def init_database():
 
     return True
 
+
 init_database()
+
+
 @app.get("/health")
 async def health_check():
     """Проверка работоспособности приложения"""
-    return {"status": "ok", "message": "QuickLead Manager работает", "version": "1.0.0"}
+    return {
+        "status": "ok",
+        "message": "QuickLead Manager работает",
+        "version": "1.0.0",
+        "caches": {
+            "api_keys": project_cache.stats(),
+            "principals": principal_cache.stats(),
+        },
+    }
 
 
 if __name__ == "__main__":
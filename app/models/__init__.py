@@ -1,10 +1,10 @@
 """Модели SQLAlchemy для базы данных"""
 
 from app.models.enums import LeadStatus, UserRole
-from app.models.lead import Lead, LeadComment, LeadStatusHistory
+from app.models.lead import Lead, LeadComment, LeadDailyRollup, LeadStatusHistory
 from app.models.project import Project, ProjectUser
 from app.models.user import User
-from app.models.webhook import WebhookLog
+from app.models.webhook import WebhookLog, WebhookOutbox, WebhookPayload
 
 __all__ = [
     # Enums
@@ -17,5 +17,8 @@ __all__ = [
     "Lead",
     "LeadStatusHistory",
     "LeadComment",
+    "LeadDailyRollup",
     "WebhookLog",
+    "WebhookOutbox",
+    "WebhookPayload",
 ]
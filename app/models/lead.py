@@ -1,9 +1,23 @@
 """Модели заявок"""
 
-from datetime import datetime
+from datetime import date, datetime, timezone
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Integer, JSON, String, Text, func
+from sqlalchemy import (
+    DDL,
+    JSON,
+    Boolean,
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -14,7 +28,14 @@ class Lead(Base):
     """Модель заявки"""
 
     __tablename__ = "leads"
-
+    __table_args__ = (
+        # Индексы под фильтры списка заявок и статистику
+        Index("ix_leads_project_id_created_at", "project_id", "created_at"),
+        Index("ix_leads_project_id_status", "project_id", "status"),
+        Index("ix_leads_project_id_priority", "project_id", "priority"),
+        Index("ix_leads_assigned_to_status", "assigned_to", "status"),
+        Index("ix_leads_created_at", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     project_id: Mapped[int] = mapped_column(
@@ -51,24 +72,67 @@ class Lead(Base):
     user_agent: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     referrer: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
 
+    # Время задается на стороне приложения, чтобы у всех заявок была
+    # одинаковая точность - по (created_at, id) работает keyset-пагинация
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
     )
     updated_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), onupdate=func.now(), nullable=True
     )
 
+    # Версия строки для оптимистичной блокировки: ORM пишет
+    # UPDATE ... WHERE id = :id AND version = :version и увеличивает ее
+    version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=1, server_default="1"
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
     # Связи
     project: Mapped["Project"] = relationship("Project", back_populates="leads")
     assigned_user: Mapped[Optional["User"]] = relationship("User")
     status_history: Mapped[list["LeadStatusHistory"]] = relationship(
-        "LeadStatusHistory", back_populates="lead"
+        "LeadStatusHistory", back_populates="lead", cascade="all, delete-orphan"
     )
     comments: Mapped[list["LeadComment"]] = relationship(
-        "LeadComment", back_populates="lead"
+        "LeadComment", back_populates="lead", cascade="all, delete-orphan"
     )
 
 
+# Поисковый индекс заявок. В SQLite - FTS5 таблица с trigram токенизатором
+# (поиск по подстроке), синхронизируется в LeadRepository. В PostgreSQL -
+# trigram GIN индексы по выражениям, которые база обновляет сама.
+LEAD_SEARCH_TEXT_SQL = (
+    "(coalesce(name, '') || ' ' || coalesce(email, '') || ' ' "
+    "|| coalesce(message, ''))"
+)
+LEAD_SEARCH_PHONE_SQL = "regexp_replace(coalesce(phone, ''), '\\D', '', 'g')"
+LEAD_SEARCH_FTS_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts "
+    "USING fts5(name, phone, email, message, tokenize='trigram')"
+)
+
+event.listen(
+    Lead.__table__,
+    "after_create",
+    DDL(LEAD_SEARCH_FTS_SQL).execute_if(dialect="sqlite"),
+)
+event.listen(
+    Lead.__table__,
+    "after_create",
+    DDL(
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;"
+        "CREATE INDEX IF NOT EXISTS ix_leads_search_text ON leads "
+        f"USING gin ({LEAD_SEARCH_TEXT_SQL} gin_trgm_ops);"
+        "CREATE INDEX IF NOT EXISTS ix_leads_search_phone ON leads "
+        f"USING gin (({LEAD_SEARCH_PHONE_SQL}) gin_trgm_ops)"
+    ).execute_if(dialect="postgresql"),
+)
+
+
 class LeadStatusHistory(Base):
     """История изменения статусов заявок"""
 
@@ -76,7 +140,7 @@ class LeadStatusHistory(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     lead_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("leads.id"), nullable=False
+        Integer, ForeignKey("leads.id"), nullable=False, index=True
     )
     old_status: Mapped[Optional[LeadStatus]] = mapped_column(
         Enum(LeadStatus), nullable=True
@@ -102,7 +166,7 @@ class LeadComment(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     lead_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("leads.id"), nullable=False
+        Integer, ForeignKey("leads.id"), nullable=False, index=True
     )
     user_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("users.id"), nullable=False
@@ -119,3 +183,19 @@ class LeadComment(Base):
     lead: Mapped["Lead"] = relationship("Lead", back_populates="comments")
     user: Mapped["User"] = relationship("User")
 
+
+class LeadDailyRollup(Base):
+    """Количество заявок по проекту, дню создания и текущему статусу
+
+    Поддерживается в LeadRepository при создании, смене статуса и удалении
+    заявок, из нее строится статистика дашборда.
+    """
+
+    __tablename__ = "lead_daily_rollup"
+
+    project_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("projects.id"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[LeadStatus] = mapped_column(Enum(LeadStatus), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
@@ -3,8 +3,18 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, Integer, String, Text, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    func,
+    literal,
+)
+from sqlalchemy.orm import Mapped, mapped_column, query_expression, relationship
 
 from app.database import Base
 
@@ -47,6 +57,14 @@ class Project(Base):
     )
     webhook_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     webhook_headers: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Пакетная отправка: до webhook_batch_size заявок массивом в одном POST,
+    # неполный пакет ждет не дольше webhook_batch_window_ms (1 - без пакетов)
+    webhook_batch_size: Mapped[int] = mapped_column(
+        Integer, default=1, server_default="1"
+    )
+    webhook_batch_window_ms: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0"
+    )
     custom_fields_schema: Mapped[Optional[dict]] = mapped_column(
         JSON, nullable=True
     )  # Схема дополнительных полей
@@ -61,6 +79,9 @@ class Project(Base):
         DateTime(timezone=True), onupdate=func.now(), nullable=True
     )
 
+    # Количество заявок, заполняется запросом (ProjectRepository)
+    leads_count: Mapped[int] = query_expression(default_expr=literal(0))
+
     # Связи
     leads: Mapped[list["Lead"]] = relationship("Lead", back_populates="project")
     project_users: Mapped[list["ProjectUser"]] = relationship(
@@ -1,11 +1,22 @@
 """Модель вебхуков"""
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, JSON, String, Text, func
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Integer,
+    JSON,
+    LargeBinary,
+    String,
+    Text,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
+from app.config import settings
 from app.database import Base
 
 
@@ -18,21 +29,75 @@ class WebhookLog(Base):
     project_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("projects.id"), nullable=False
     )
-    lead_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("leads.id"), nullable=False
+    # Пустой у пакетной отправки, заявки пакета перечислены в lead_results
+    lead_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("leads.id"), nullable=True
     )
     webhook_url: Mapped[str] = mapped_column(String(500), nullable=False)
-    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    # Старые записи хранят payload целиком, новые - ссылку на webhook_payloads
+    payload: Mapped[Optional[dict | list]] = mapped_column(JSON, nullable=True)
+    payload_hash: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, index=True
+    )
+    # Результат по каждой заявке пакета: [{"lead_id": ..., "is_success": ...}]
+    lead_results: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
     response_status: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     response_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     attempt: Mapped[int] = mapped_column(Integer, default=1)
     is_success: Mapped[bool] = mapped_column(Boolean, default=False)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now()
+        DateTime(timezone=True), server_default=func.now(), index=True
     )
 
     # Связи
     project: Mapped["Project"] = relationship("Project")
-    lead: Mapped["Lead"] = relationship("Lead")
+    lead: Mapped[Optional["Lead"]] = relationship("Lead")
+
+    @validates("response_body", "error_message")
+    def _truncate_body(self, key: str, value: Optional[str]) -> Optional[str]:
+        """Обрезать ответ получателя до webhook_log_body_max_chars"""
+        limit = settings.webhook_log_body_max_chars
+        if value is None or limit <= 0 or len(value) <= limit:
+            return value
+        return f"{value[:limit]}... [обрезано {len(value) - limit} симв.]"
+
+
+class WebhookPayload(Base):
+    """Тело вебхука, общее для всех попыток отправки
 
+    Ключ - sha256 канонического JSON, поэтому повторы и одинаковые
+    payload хранятся один раз. encoding: "json" или "zlib". created_at
+    обновляется при каждом повторном сохранении (время последнего
+    использования), по нему очищаются payload без ссылок.
+    """
+
+    __tablename__ = "webhook_payloads"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    encoding: Mapped[str] = mapped_column(String(16), nullable=False)
+    body: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+
+
+class WebhookOutbox(Base):
+    """Исходящие события вебхуков (transactional outbox)
+
+    Строка пишется в одной транзакции с заявкой и удаляется после
+    постановки отправки в Celery. Внешних ключей нет: это очередь, а не
+    история, и удаление заявки или проекта не должно на нее натыкаться.
+    """
+
+    __tablename__ = "webhook_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    project_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    lead_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Время с точностью до микросекунд нужно для окна пакетной отправки
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
@@ -1,7 +1,17 @@
 """Репозитории для доступа к данным (Data Access Layer)"""
 
-from app.repositories.lead_repository import LeadRepository
-from app.repositories.project_repository import ProjectRepository
-from app.repositories.user_repository import UserRepository
+from app.repositories.lead_repository import AsyncLeadRepository, LeadRepository
+from app.repositories.project_repository import (
+    AsyncProjectRepository,
+    ProjectRepository,
+)
+from app.repositories.user_repository import AsyncUserRepository, UserRepository
 
-__all__ = ["UserRepository", "ProjectRepository", "LeadRepository"]
+__all__ = [
+    "UserRepository",
+    "ProjectRepository",
+    "LeadRepository",
+    "AsyncUserRepository",
+    "AsyncProjectRepository",
+    "AsyncLeadRepository",
+]
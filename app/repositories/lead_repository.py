@@ -1,14 +1,41 @@
 """Репозиторий для работы с заявками"""
 
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from sqlalchemy import func, or_, select
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Row,
+    Select,
+    and_,
+    case,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.config import settings
 from app.models.enums import LeadStatus
 from app.models.lead import Lead, LeadComment, LeadStatusHistory
-from app.schemas import LeadCommentCreate, LeadCreate, LeadFilter, LeadUpdate
+from app.models.project import Project
+from app.repositories.lead_search import LeadSearchIndex
+from app.repositories.project_repository import ProjectRepository
+from app.repositories.rollup_repository import (
+    LeadRollupRepository,
+    lead_day,
+    lead_day_sql,
+)
+from app.repositories.webhook_repository import WebhookOutboxRepository
+from app.schemas import (
+    LeadCommentCreate,
+    LeadCreate,
+    LeadFilter,
+    LeadResponse,
+    LeadUpdate,
+)
 
 
 class LeadRepository:
@@ -20,6 +47,55 @@ class LeadRepository:
         stmt = select(Lead).where(Lead.id == lead_id)
         return db.scalar(stmt)
 
+    @staticmethod
+    def get_lead_detail(db: Session, lead_id: int) -> Optional[Lead]:
+        """Получить заявку со всеми данными для LeadDetailResponse
+
+        Граф загружается фиксированным числом запросов независимо от
+        размера истории и комментариев: заявка с ответственным одним JOIN,
+        проект с количеством заявок, история и комментарии вместе с
+        пользователями - отдельными SELECT ... IN.
+        """
+        stmt = (
+            select(Lead)
+            .where(Lead.id == lead_id)
+            .options(
+                joinedload(Lead.assigned_user),
+                selectinload(Lead.project).with_expression(
+                    Project.leads_count, ProjectRepository.leads_count_expression()
+                ),
+                selectinload(Lead.status_history).joinedload(LeadStatusHistory.user),
+                selectinload(Lead.comments).joinedload(LeadComment.user),
+            )
+        )
+        return db.scalar(stmt)
+
+    @staticmethod
+    def _apply_filters(
+        db: Session, stmt: Select, filters: Optional[LeadFilter]
+    ) -> Select:
+        """Применить фильтры заявок к запросу"""
+        if not filters:
+            return stmt
+
+        if filters.project_id:
+            stmt = stmt.where(Lead.project_id == filters.project_id)
+        if filters.project_ids is not None:
+            stmt = stmt.where(Lead.project_id.in_(filters.project_ids))
+        if filters.status:
+            stmt = stmt.where(Lead.status == filters.status)
+        if filters.assigned_to:
+            stmt = stmt.where(Lead.assigned_to == filters.assigned_to)
+        if filters.priority:
+            stmt = stmt.where(Lead.priority == filters.priority)
+        if filters.date_from:
+            stmt = stmt.where(Lead.created_at >= filters.date_from)
+        if filters.date_to:
+            stmt = stmt.where(Lead.created_at <= filters.date_to)
+        if filters.search:
+            stmt = stmt.where(LeadSearchIndex.condition(db, filters.search))
+        return stmt
+
     @staticmethod
     def get_leads(
         db: Session,
@@ -28,44 +104,59 @@ class LeadRepository:
         limit: int = 100,
     ) -> List[Lead]:
         """Получить список заявок с фильтрацией"""
-        stmt = select(Lead)
-
-        if filters:
-            if filters.project_id:
-                stmt = stmt.where(Lead.project_id == filters.project_id)
-            if filters.status:
-                stmt = stmt.where(Lead.status == filters.status)
-            if filters.assigned_to:
-                stmt = stmt.where(Lead.assigned_to == filters.assigned_to)
-            if filters.priority:
-                stmt = stmt.where(Lead.priority == filters.priority)
-            if filters.date_from:
-                stmt = stmt.where(Lead.created_at >= filters.date_from)
-            if filters.date_to:
-                stmt = stmt.where(Lead.created_at <= filters.date_to)
-            if filters.search:
-                search_term = f"%{filters.search}%"
-                stmt = stmt.where(
-                    or_(
-                        Lead.name.ilike(search_term),
-                        Lead.phone.ilike(search_term),
-                        Lead.email.ilike(search_term),
-                    )
-                )
+        stmt = LeadRepository._apply_filters(db, select(Lead), filters)
+        stmt = stmt.order_by(Lead.id).offset(skip).limit(limit)
+        return list(db.scalars(stmt).all())
+
+    @staticmethod
+    def get_leads_after(
+        db: Session,
+        filters: Optional[LeadFilter] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+    ) -> List[Lead]:
+        """Получить страницу заявок по курсору (keyset-пагинация)
 
-        stmt = stmt.offset(skip).limit(limit)
+        Заявки упорядочены по (created_at, id) от новых к старым, after -
+        ключ последней заявки предыдущей страницы.
+        """
+        stmt = LeadRepository._apply_filters(db, select(Lead), filters)
+        if after:
+            created_at, lead_id = after
+            stmt = stmt.where(
+                or_(
+                    Lead.created_at < created_at,
+                    and_(Lead.created_at == created_at, Lead.id < lead_id),
+                )
+            )
+        stmt = stmt.order_by(Lead.created_at.desc(), Lead.id.desc()).limit(limit)
         return list(db.scalars(stmt).all())
 
     @staticmethod
-    def create_lead(
+    def iter_export_rows(
         db: Session,
+        columns: Sequence[Any],
+        filters: Optional[LeadFilter] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Row]:
+        """Построчно прочитать колонки заявок для выгрузки
+
+        Строки читаются из серверного курсора пачками по batch_size,
+        объекты Lead не создаются.
+        """
+        stmt = LeadRepository._apply_filters(db, select(*columns), filters)
+        stmt = stmt.order_by(Lead.id).execution_options(yield_per=batch_size)
+        yield from db.execute(stmt)
+
+    @staticmethod
+    def _build_lead(
         lead: LeadCreate,
         ip_address: str = None,
         user_agent: str = None,
         referrer: str = None,
     ) -> Lead:
-        """Создать новую заявку"""
-        db_lead = Lead(
+        """Собрать объект заявки из схемы создания"""
+        return Lead(
             project_id=lead.project_id,
             name=lead.name,
             phone=lead.phone,
@@ -81,56 +172,359 @@ class LeadRepository:
             user_agent=user_agent,
             referrer=referrer,
         )
+
+    @staticmethod
+    def create_lead(
+        db: Session,
+        lead: LeadCreate,
+        ip_address: str = None,
+        user_agent: str = None,
+        referrer: str = None,
+    ) -> Lead:
+        """Создать новую заявку"""
+        db_lead = LeadRepository._build_lead(
+            lead, ip_address=ip_address, user_agent=user_agent, referrer=referrer
+        )
         db.add(db_lead)
-        db.commit()
-        db.refresh(db_lead)
+        db.flush()
 
         # Создаем запись в истории статусов
         history = LeadStatusHistory(
             lead_id=db_lead.id, new_status=db_lead.status, comment="Заявка создана"
         )
         db.add(history)
+        LeadSearchIndex.index_lead(db, db_lead)
+        LeadRollupRepository.apply(
+            db, [(db_lead.project_id, lead_day(db_lead.created_at), db_lead.status, 1)]
+        )
         db.commit()
+        db.refresh(db_lead)
 
         return db_lead
 
+    @staticmethod
+    def ingest_lead(
+        db: Session,
+        lead: LeadCreate,
+        ip_address: str = None,
+        user_agent: str = None,
+        referrer: str = None,
+        notify_webhook: bool = False,
+    ) -> LeadResponse:
+        """Принять заявку одной транзакцией (внешний API)
+
+        Заявка и запись истории пишутся одним flush и одним commit. Значения,
+        которые обычно проставляет БД, задаются явно, поэтому ответ строится
+        из объекта в памяти без refresh. При notify_webhook в той же
+        транзакции пишется событие в webhook_outbox.
+        """
+        db_lead = LeadRepository._build_lead(
+            lead, ip_address=ip_address, user_agent=user_agent, referrer=referrer
+        )
+        db_lead.status = LeadStatus.NEW
+        db_lead.priority = 1
+        db_lead.created_at = datetime.now(timezone.utc)
+        db_lead.status_history.append(
+            LeadStatusHistory(
+                new_status=db_lead.status,
+                comment="Заявка создана",
+                created_at=db_lead.created_at,
+            )
+        )
+        db.add(db_lead)
+        db.flush()
+        LeadSearchIndex.index_lead(db, db_lead)
+        LeadRollupRepository.apply(
+            db, [(db_lead.project_id, lead_day(db_lead.created_at), db_lead.status, 1)]
+        )
+        if notify_webhook:
+            WebhookOutboxRepository.add(db, [(db_lead.project_id, db_lead.id)])
+
+        # Ответ собираем до commit, пока атрибуты не истекли
+        response = LeadResponse.model_validate(db_lead)
+        db.commit()
+        return response
+
+    @staticmethod
+    def ingest_leads(
+        db: Session,
+        items: Sequence[
+            Tuple[LeadCreate, Optional[str], Optional[str], Optional[str], bool]
+        ],
+    ) -> List[LeadResponse]:
+        """Принять пачку заявок одной транзакцией
+
+        Каждый элемент - (заявка, ip_address, user_agent, referrer,
+        notify_webhook). Заявки и записи истории вставляются двумя
+        executemany INSERT в одной транзакции с одним commit
+        (см. _insert_leads).
+        """
+        created_at = datetime.now(timezone.utc)
+        rows = []
+        notify = []
+        for lead, ip_address, user_agent, referrer, notify_webhook in items:
+            notify.append(notify_webhook)
+            rows.append(
+                {
+                    **lead.model_dump(exclude={"project_id"}),
+                    "project_id": lead.project_id,
+                    "status": LeadStatus.NEW,
+                    "priority": 1,
+                    "ip_address": ip_address,
+                    "user_agent": user_agent,
+                    "referrer": referrer,
+                    "created_at": created_at,
+                }
+            )
+        if not rows:
+            return []
+
+        lead_ids = LeadRepository._insert_leads(db, rows, notify)
+        db.commit()
+
+        return [
+            LeadResponse.model_validate({**row, "id": lead_id})
+            for row, lead_id in zip(rows, lead_ids)
+        ]
+
+    @staticmethod
+    def import_leads(db: Session, leads: Sequence[LeadCreate]) -> int:
+        """Импортировать пачку проверенных заявок одной транзакцией
+
+        Вставка та же, что у ingest_leads, но без событий вебхуков и без
+        сборки ответа по каждой заявке. Возвращает число заявок.
+        """
+        created_at = datetime.now(timezone.utc)
+        rows = [
+            {
+                **lead.model_dump(),
+                "status": LeadStatus.NEW,
+                "priority": 1,
+                "created_at": created_at,
+            }
+            for lead in leads
+        ]
+        if not rows:
+            return 0
+
+        LeadRepository._insert_leads(db, rows, [False] * len(rows))
+        db.commit()
+        return len(rows)
+
+    @staticmethod
+    def _insert_leads(
+        db: Session, rows: List[Dict[str, Any]], notify: Sequence[bool]
+    ) -> List[int]:
+        """Вставить заявки с историей, индексом и счетчиками (без commit)
+
+        Все строки rows созданы в один момент created_at со статусом NEW.
+        Возвращает id заявок в порядке rows.
+        """
+        created_at = rows[0]["created_at"]
+        if db.get_bind().dialect.name == "sqlite":
+            lead_ids = LeadRepository._insert_leads_sqlite(db, rows)
+        else:
+            lead_ids = db.scalars(
+                insert(Lead).returning(Lead.id, sort_by_parameter_order=True), rows
+            ).all()
+        db.execute(
+            insert(LeadStatusHistory.__table__),
+            [
+                {
+                    "lead_id": lead_id,
+                    "new_status": LeadStatus.NEW,
+                    "comment": "Заявка создана",
+                    "created_at": created_at,
+                }
+                for lead_id in lead_ids
+            ],
+        )
+        LeadSearchIndex.index_leads(
+            db,
+            [
+                (lead_id, row["name"], row["phone"], row["email"], row["message"])
+                for row, lead_id in zip(rows, lead_ids)
+            ],
+        )
+        LeadRollupRepository.apply(
+            db,
+            [
+                (row["project_id"], lead_day(created_at), LeadStatus.NEW, 1)
+                for row in rows
+            ],
+        )
+        WebhookOutboxRepository.add(
+            db,
+            [
+                (row["project_id"], lead_id)
+                for row, lead_id, notify_webhook in zip(rows, lead_ids, notify)
+                if notify_webhook
+            ],
+        )
+        return list(lead_ids)
+
+    @staticmethod
+    def _insert_leads_sqlite(db: Session, rows: List[Dict[str, Any]]) -> List[int]:
+        """Вставить заявки одним executemany, вернуть id в порядке rows
+
+        SQLite не гарантирует порядок RETURNING, а сортировка по параметрам
+        вставляет строки по одной. id берутся из rowid (leads.id без
+        AUTOINCREMENT): новая строка получает max(id) + 1, поэтому
+        executemany дает подряд идущий блок после прежнего максимума.
+        Если блок не сходится (AUTOINCREMENT, чужая запись между чтением
+        максимума и вставкой), выбрасывается RuntimeError и транзакцию
+        откатывает вызывающий код - иначе история, индекс и события
+        вебхуков попали бы к чужим заявкам.
+        """
+        first_id = (db.scalar(select(func.max(Lead.id))) or 0) + 1
+        db.execute(insert(Lead.__table__), rows)
+        last_id = db.scalar(select(func.max(Lead.id)))
+        if last_id - first_id + 1 != len(rows):
+            raise RuntimeError(
+                f"id новых заявок не образуют блок {first_id}..{last_id} "
+                f"из {len(rows)} строк"
+            )
+        return list(range(first_id, last_id + 1))
+
     @staticmethod
     def update_lead(
         db: Session,
-        lead_id: int,
+        db_lead: Lead,
         lead_update: LeadUpdate | LeadStatus,
         changed_by: int = None,
-    ) -> Optional[Lead]:
-        """Обновить заявку"""
-        stmt = select(Lead).where(Lead.id == lead_id)
-        db_lead = db.scalar(stmt)
-        if db_lead:
-            old_status = db_lead.status
+    ) -> LeadResponse:
+        """Обновить загруженную заявку одной транзакцией
 
-            if isinstance(lead_update, LeadUpdate):
-                update_data = lead_update.model_dump(exclude_unset=True)
-            if lead_update in LeadStatus:
-                update_data = LeadUpdate.model_validate(db_lead)
-                update_data.status = lead_update
-                update_data = update_data.model_dump(exclude_unset=True)
-            for field, value in update_data.items():
-                setattr(db_lead, field, value)
+        Меняются только поля, значения которых отличаются от текущих.
+        История статуса пишется в той же транзакции, updated_at задается
+        явно, поэтому ответ строится из объекта в памяти без refresh.
+        UPDATE выполняется с условием на версию заявки: если ее успели
+        изменить после загрузки, flush выбрасывает StaleDataError.
+        """
+        if isinstance(lead_update, LeadStatus):
+            update_data = {"status": lead_update}
+        else:
+            update_data = lead_update.model_dump(exclude_unset=True)
+        changes = {
+            field: value
+            for field, value in update_data.items()
+            if getattr(db_lead, field) != value
+        }
+        if not changes:
+            return LeadResponse.model_validate(db_lead)
 
-            db.commit()
-            db.refresh(db_lead)
+        old_status = db_lead.status
+        for field, value in changes.items():
+            setattr(db_lead, field, value)
+        db_lead.updated_at = datetime.now(timezone.utc)
 
-            # Если изменился статус, добавляем в историю
-            if "status" in update_data and old_status != db_lead.status:
-                history = LeadStatusHistory(
-                    lead_id=lead_id,
+        if changes.keys() & {"name", "phone", "email", "message"}:
+            LeadSearchIndex.index_lead(db, db_lead)
+        if "status" in changes:
+            db.add(
+                LeadStatusHistory(
+                    lead_id=db_lead.id,
                     old_status=old_status,
                     new_status=db_lead.status,
                     changed_by=changed_by,
                 )
-                db.add(history)
-                db.commit()
+            )
+            day = lead_day(db_lead.created_at)
+            LeadRollupRepository.apply(
+                db,
+                [
+                    (db_lead.project_id, day, old_status, -1),
+                    (db_lead.project_id, day, db_lead.status, 1),
+                ],
+            )
 
-        return db_lead
+        # flush проверяет и увеличивает версию, ответ собираем до commit,
+        # пока атрибуты не истекли
+        db.flush()
+        response = LeadResponse.model_validate(db_lead)
+        db.commit()
+        return response
+
+    @staticmethod
+    def get_lead_keys(
+        db: Session,
+        lead_ids: Optional[Sequence[int]] = None,
+        filters: Optional[LeadFilter] = None,
+        limit: Optional[int] = None,
+    ) -> List[Row]:
+        """Получить (id, project_id, status, created_at) заявок по id или фильтру"""
+        stmt = select(Lead.id, Lead.project_id, Lead.status, Lead.created_at)
+        if lead_ids is not None:
+            stmt = stmt.where(Lead.id.in_(lead_ids))
+        stmt = LeadRepository._apply_filters(db, stmt, filters)
+        stmt = stmt.order_by(Lead.id).limit(limit)
+        return list(db.execute(stmt).all())
+
+    @staticmethod
+    def bulk_update_leads(
+        db: Session,
+        leads: Sequence[Row],
+        changes: Dict[str, Any],
+        changed_by: int = None,
+        comment: str = None,
+    ) -> Tuple[int, int]:
+        """Изменить поля группы заявок одной транзакцией
+
+        leads - строки из get_lead_keys. Заявки меняются одним
+        UPDATE ... WHERE id IN с увеличением версии (ETag заявок
+        устаревают), история статусов пишется одним executemany INSERT.
+
+        Статус прочитан до UPDATE, поэтому при смене статуса UPDATE идет
+        с условием status = прочитанному (по одному на каждый старый
+        статус). Заявки, которые успели изменить или удалить, не
+        меняются, история и счетчики строятся только по измененным
+        (RETURNING id). Возвращает (изменено заявок, сменился статус).
+        """
+        if not leads:
+            return 0, 0
+
+        new_status = changes.get("status")
+        groups: Dict[Optional[LeadStatus], List[Row]] = {}
+        for lead in leads:
+            groups.setdefault(lead.status if new_status else None, []).append(lead)
+
+        updated: List[Row] = []
+        for old_status, group in groups.items():
+            stmt = (
+                update(Lead.__table__)
+                .where(Lead.id.in_([lead.id for lead in group]))
+                .values(**changes, version=Lead.version + 1)
+                .returning(Lead.id)
+            )
+            if old_status is not None:
+                stmt = stmt.where(Lead.status == old_status)
+            updated_ids = set(db.scalars(stmt))
+            updated.extend(lead for lead in group if lead.id in updated_ids)
+
+        changed = [lead for lead in updated if new_status and lead.status != new_status]
+        if changed:
+            db.execute(
+                insert(LeadStatusHistory.__table__),
+                [
+                    {
+                        "lead_id": lead.id,
+                        "old_status": lead.status,
+                        "new_status": new_status,
+                        "changed_by": changed_by,
+                        "comment": comment,
+                    }
+                    for lead in changed
+                ],
+            )
+            deltas = []
+            for lead in changed:
+                day = lead_day(lead.created_at)
+                deltas.append((lead.project_id, day, lead.status, -1))
+                deltas.append((lead.project_id, day, new_status, 1))
+            LeadRollupRepository.apply(db, deltas)
+
+        db.commit()
+        return len(updated), len(changed)
 
     @staticmethod
     def delete_lead(db: Session, lead_id: int) -> bool:
@@ -138,7 +532,19 @@ class LeadRepository:
         stmt = select(Lead).where(Lead.id == lead_id)
         db_lead = db.scalar(stmt)
         if db_lead:
+            LeadRollupRepository.apply(
+                db,
+                [
+                    (
+                        db_lead.project_id,
+                        lead_day(db_lead.created_at),
+                        db_lead.status,
+                        -1,
+                    )
+                ],
+            )
             db.delete(db_lead)
+            LeadSearchIndex.remove_lead(db, lead_id)
             db.commit()
             return True
         return False
@@ -160,49 +566,47 @@ class LeadRepository:
         return db_comment
 
     @staticmethod
-    def get_lead_stats(db: Session, project_id: Optional[int] = None) -> Dict[str, Any]:
-        """Получить статистику по заявкам"""
-        # Базовое условие
-        conditions = []
-        if project_id:
-            conditions.append(Lead.project_id == project_id)
-
-        # Общее количество
-        total_stmt = select(func.count(Lead.id))
-        if conditions:
-            total_stmt = total_stmt.where(*conditions)
-        total = db.scalar(total_stmt) or 0
-
-        # Статистика по статусам
-        status_stats = {}
-        for status in ["new", "in_progress", "callback", "success", "failed"]:
-            stmt = select(func.count(Lead.id)).where(Lead.status == status)
-            if conditions:
-                stmt = stmt.where(*conditions)
-            count = db.scalar(stmt) or 0
-            status_stats[status] = count
+    def get_lead_stats(
+        db: Session,
+        project_id: Optional[int] = None,
+        project_ids: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """Получить статистику по заявкам
+
+        По умолчанию статистика читается из счетчиков lead_daily_rollup,
+        иначе все счетчики считаются одним проходом по заявкам через
+        условные SUM. Дни в обоих случаях считаются в UTC (lead_day_sql).
+        """
+        if settings.lead_stats_from_rollup:
+            return LeadRollupRepository.get_stats(
+                db, project_id=project_id, project_ids=project_ids
+            )
 
         # Статистика по периодам
-        today = datetime.now().date()
+        today = datetime.now(timezone.utc).date()
         week_ago = today - timedelta(days=7)
         month_ago = today - timedelta(days=30)
+        day = lead_day_sql(db.get_bind().dialect.name)
 
-        leads_today_stmt = select(func.count(Lead.id)).where(Lead.created_at >= today)
-        if conditions:
-            leads_today_stmt = leads_today_stmt.where(*conditions)
-        leads_today = db.scalar(leads_today_stmt) or 0
+        def count_if(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
 
-        leads_week_stmt = select(func.count(Lead.id)).where(Lead.created_at >= week_ago)
-        if conditions:
-            leads_week_stmt = leads_week_stmt.where(*conditions)
-        leads_week = db.scalar(leads_week_stmt) or 0
-
-        leads_month_stmt = select(func.count(Lead.id)).where(
-            Lead.created_at >= month_ago
+        statuses = list(LeadStatus)
+        stmt = select(
+            func.count(Lead.id),
+            *[count_if(Lead.status == status) for status in statuses],
+            count_if(day >= today),
+            count_if(day >= week_ago),
+            count_if(day >= month_ago),
         )
-        if conditions:
-            leads_month_stmt = leads_month_stmt.where(*conditions)
-        leads_month = db.scalar(leads_month_stmt) or 0
+        if project_id:
+            stmt = stmt.where(Lead.project_id == project_id)
+        if project_ids is not None:
+            stmt = stmt.where(Lead.project_id.in_(project_ids))
+
+        total, *counts = db.execute(stmt).one()
+        status_stats = {status.value: count for status, count in zip(statuses, counts)}
+        leads_today, leads_week, leads_month = counts[len(statuses) :]
 
         # Конверсия
         success_count = status_stats.get("success", 0)
@@ -216,3 +620,68 @@ class LeadRepository:
             "leads_this_month": leads_month,
             "conversion_rate": round(conversion_rate, 2),
         }
+
+
+class AsyncLeadRepository:
+    """Асинхронный доступ к данным заявок
+
+    Запросы выполняются кодом LeadRepository внутри AsyncSession.run_sync:
+    SQL и транзакции общие с синхронным репозиторием, а ввод-вывод идет
+    через асинхронный драйвер и не блокирует event loop.
+    """
+
+    @staticmethod
+    async def get_leads(
+        db: AsyncSession,
+        filters: Optional[LeadFilter] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Lead]:
+        """Получить список заявок с фильтрацией"""
+        return await db.run_sync(
+            LeadRepository.get_leads, filters=filters, skip=skip, limit=limit
+        )
+
+    @staticmethod
+    async def get_leads_after(
+        db: AsyncSession,
+        filters: Optional[LeadFilter] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+    ) -> List[Lead]:
+        """Получить страницу заявок после ключа (created_at, id)"""
+        return await db.run_sync(
+            LeadRepository.get_leads_after, filters=filters, after=after, limit=limit
+        )
+
+    @staticmethod
+    async def ingest_lead(
+        db: AsyncSession,
+        lead: LeadCreate,
+        ip_address: str = None,
+        user_agent: str = None,
+        referrer: str = None,
+        notify_webhook: bool = False,
+    ) -> LeadResponse:
+        """Принять заявку из внешнего API одной транзакцией"""
+        return await db.run_sync(
+            LeadRepository.ingest_lead,
+            lead,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            referrer=referrer,
+            notify_webhook=notify_webhook,
+        )
+
+    @staticmethod
+    async def get_lead_stats(
+        db: AsyncSession,
+        project_id: Optional[int] = None,
+        project_ids: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """Получить статистику по заявкам"""
+        return await db.run_sync(
+            LeadRepository.get_lead_stats,
+            project_id=project_id,
+            project_ids=project_ids,
+        )
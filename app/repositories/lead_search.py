@@ -0,0 +1,168 @@
+"""Поисковый индекс заявок"""
+
+import re
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import ColumnElement, Integer, column, literal_column, or_, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.lead import (
+    LEAD_SEARCH_FTS_SQL,
+    LEAD_SEARCH_PHONE_SQL,
+    LEAD_SEARCH_TEXT_SQL,
+    Lead,
+)
+
+# Минимальная длина подстроки для trigram индекса
+MIN_TERM_LENGTH = 3
+
+# (id, name, phone, email, message)
+SearchRow = Tuple[int, Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    """Оставить в телефоне только цифры"""
+    return re.sub(r"\D", "", phone or "")
+
+
+class LeadSearchIndex:
+    """Полнотекстовый поиск по имени, телефону, email и сообщению заявки
+
+    В SQLite поиск идет по FTS5 таблице leads_fts (rowid = id заявки),
+    которую репозиторий обновляет при создании, изменении и удалении
+    заявок. В PostgreSQL используются trigram индексы по выражениям.
+    Телефон индексируется и ищется только по цифрам.
+
+    При lead_search_fts=False FTS таблица не читается и не обновляется;
+    после включения индекс создается и перестраивается при старте
+    приложения (ensure_index), если таблицы еще нет, иначе его нужно
+    перестроить (rebuild).
+    """
+
+    @staticmethod
+    def _is_sqlite(db: Session) -> bool:
+        return db.get_bind().dialect.name == "sqlite"
+
+    @staticmethod
+    def _is_fts(db: Session) -> bool:
+        return settings.lead_search_fts and LeadSearchIndex._is_sqlite(db)
+
+    @staticmethod
+    def _is_enabled(db: Session) -> bool:
+        return settings.lead_search_fts and db.get_bind().dialect.name in (
+            "sqlite",
+            "postgresql",
+        )
+
+    @staticmethod
+    def index_leads(db: Session, rows: Iterable[SearchRow]) -> None:
+        """Добавить или обновить заявки в индексе"""
+        if not LeadSearchIndex._is_fts(db):
+            return
+        params = [
+            {
+                "id": lead_id,
+                "name": name,
+                "phone": normalize_phone(phone),
+                "email": email,
+                "message": message,
+            }
+            for lead_id, name, phone, email, message in rows
+        ]
+        if not params:
+            return
+        db.execute(
+            text(
+                "INSERT OR REPLACE INTO leads_fts (rowid, name, phone, email, message) "
+                "VALUES (:id, :name, :phone, :email, :message)"
+            ),
+            params,
+        )
+
+    @staticmethod
+    def index_lead(db: Session, lead: Lead) -> None:
+        """Добавить или обновить заявку в индексе"""
+        LeadSearchIndex.index_leads(
+            db, [(lead.id, lead.name, lead.phone, lead.email, lead.message)]
+        )
+
+    @staticmethod
+    def remove_lead(db: Session, lead_id: int) -> None:
+        """Удалить заявку из индекса"""
+        if LeadSearchIndex._is_fts(db):
+            db.execute(text("DELETE FROM leads_fts WHERE rowid = :id"), {"id": lead_id})
+
+    @staticmethod
+    def rebuild(db: Session) -> None:
+        """Перестроить индекс по всем заявкам"""
+        if not LeadSearchIndex._is_fts(db):
+            return
+        db.execute(text("DELETE FROM leads_fts"))
+        rows = db.execute(
+            text("SELECT id, name, phone, email, message FROM leads")
+        ).yield_per(1000)
+        batch = []
+        for row in rows:
+            batch.append(tuple(row))
+            if len(batch) >= 1000:
+                LeadSearchIndex.index_leads(db, batch)
+                batch = []
+        LeadSearchIndex.index_leads(db, batch)
+
+    @staticmethod
+    def ensure_index(db: Session) -> bool:
+        """Создать и заполнить FTS таблицу, если ее нет
+
+        Таблица создается вместе с leads (create_all) и миграцией 0002, а
+        база, созданная раньше и не обновленная миграциями, иначе роняла
+        бы каждую вставку заявки. Возвращает True, если индекс создан.
+        """
+        if not LeadSearchIndex._is_fts(db):
+            return False
+        exists = db.scalar(
+            text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'leads_fts'"
+            )
+        )
+        if exists:
+            return False
+        db.execute(text(LEAD_SEARCH_FTS_SQL))
+        LeadSearchIndex.rebuild(db)
+        db.commit()
+        return True
+
+    @staticmethod
+    def condition(db: Session, term: str) -> ColumnElement[bool]:
+        """Условие поиска заявок по строке"""
+        if not LeadSearchIndex._is_enabled(db) or len(term) < MIN_TERM_LENGTH:
+            return LeadSearchIndex._like_condition(term)
+
+        digits = normalize_phone(term)
+        if LeadSearchIndex._is_sqlite(db):
+            # Строка ищется как фраза (подстрока), кавычки экранируются
+            query = '{name email message} : "%s"' % term.replace('"', '""')
+            if len(digits) >= MIN_TERM_LENGTH:
+                query += ' OR phone : "%s"' % digits
+            matches = (
+                text("SELECT rowid FROM leads_fts WHERE leads_fts MATCH :query")
+                .bindparams(query=query)
+                .columns(column("rowid", Integer))
+            )
+            return Lead.id.in_(matches)
+
+        # PostgreSQL: выражения совпадают с trigram индексами из модели
+        conditions = [literal_column(LEAD_SEARCH_TEXT_SQL).ilike(f"%{term}%")]
+        if len(digits) >= MIN_TERM_LENGTH:
+            conditions.append(literal_column(LEAD_SEARCH_PHONE_SQL).like(f"%{digits}%"))
+        return or_(*conditions)
+
+    @staticmethod
+    def _like_condition(term: str) -> ColumnElement[bool]:
+        search_term = f"%{term}%"
+        return or_(
+            Lead.name.ilike(search_term),
+            Lead.phone.ilike(search_term),
+            Lead.email.ilike(search_term),
+            Lead.message.ilike(search_term),
+        )
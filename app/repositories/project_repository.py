@@ -1,11 +1,14 @@
 """Репозиторий для работы с проектами"""
 
-from typing import List, Optional
+from typing import Iterable, List, Optional
 
-from sqlalchemy import and_, select
-from sqlalchemy.orm import Session
+from sqlalchemy import ScalarSelect, Select, and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, with_expression
 
 from app.auth import generate_api_key
+from app.cache import evict_project_principals, evict_user_principal, project_cache
+from app.models.lead import Lead
 from app.models.project import Project, ProjectUser
 from app.schemas import ProjectCreate, ProjectUpdate
 
@@ -13,11 +16,33 @@ from app.schemas import ProjectCreate, ProjectUpdate
 class ProjectRepository:
     """Репозиторий для доступа к данным проектов"""
 
+    @staticmethod
+    def leads_count_expression() -> ScalarSelect[int]:
+        """Подзапрос COUNT заявок проекта по индексу project_id
+
+        Счетчик считается только для проектов, попавших в выборку,
+        сами заявки не загружаются.
+        """
+        return (
+            select(func.count(Lead.id))
+            .where(Lead.project_id == Project.id)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def _with_leads_count(stmt: Select) -> Select:
+        """Заполнить Project.leads_count в выборке проектов"""
+        return stmt.options(
+            with_expression(
+                Project.leads_count, ProjectRepository.leads_count_expression()
+            )
+        )
+
     @staticmethod
     def get_project(db: Session, project_id: int) -> Optional[Project]:
         """Получить проект по ID"""
         stmt = select(Project).where(Project.id == project_id)
-        return db.scalar(stmt)
+        return db.scalar(ProjectRepository._with_leads_count(stmt))
 
     @staticmethod
     def get_project_by_api_key(db: Session, api_key: str) -> Optional[Project]:
@@ -27,9 +52,23 @@ class ProjectRepository:
 
     @staticmethod
     def get_projects(db: Session, skip: int = 0, limit: int = 100) -> List[Project]:
-        """Получить список проектов"""
-        stmt = select(Project).offset(skip).limit(limit)
-        return list(db.scalars(stmt).all())
+        """Получить список проектов с количеством заявок"""
+        stmt = select(Project).order_by(Project.id).offset(skip).limit(limit)
+        return list(db.scalars(ProjectRepository._with_leads_count(stmt)).all())
+
+    @staticmethod
+    def get_projects_by_ids(
+        db: Session, project_ids: Iterable[int], skip: int = 0, limit: int = 100
+    ) -> List[Project]:
+        """Получить проекты по списку ID с количеством заявок"""
+        stmt = (
+            select(Project)
+            .where(Project.id.in_(list(project_ids)))
+            .order_by(Project.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(db.scalars(ProjectRepository._with_leads_count(stmt)).all())
 
     @staticmethod
     def create_project(db: Session, project: ProjectCreate) -> Project:
@@ -41,6 +80,8 @@ class ProjectRepository:
             api_key=api_key,
             webhook_url=project.webhook_url,
             webhook_headers=project.webhook_headers,
+            webhook_batch_size=project.webhook_batch_size,
+            webhook_batch_window_ms=project.webhook_batch_window_ms,
             custom_fields_schema=project.custom_fields_schema,
             status_config=project.status_config,
         )
@@ -62,7 +103,13 @@ class ProjectRepository:
                 setattr(db_project, field, value)
 
             db.commit()
-            db.refresh(db_project)
+            project_cache.invalidate(db_project.api_key)
+            # Перечитываем проект вместе с количеством заявок
+            db_project = db.scalar(
+                ProjectRepository._with_leads_count(stmt).execution_options(
+                    populate_existing=True
+                )
+            )
         return db_project
 
     @staticmethod
@@ -71,8 +118,11 @@ class ProjectRepository:
         stmt = select(Project).where(Project.id == project_id)
         db_project = db.scalar(stmt)
         if db_project:
+            api_key = db_project.api_key
             db.delete(db_project)
             db.commit()
+            project_cache.invalidate(api_key)
+            evict_project_principals(project_id)
             return True
         return False
 
@@ -90,6 +140,7 @@ class ProjectRepository:
         assignment = ProjectUser(project_id=project_id, user_id=user_id)
         db.add(assignment)
         db.commit()
+        evict_user_principal(user_id)
         return True
 
     @staticmethod
@@ -103,5 +154,24 @@ class ProjectRepository:
         if assignment:
             db.delete(assignment)
             db.commit()
+            evict_user_principal(user_id)
             return True
         return False
+
+
+class AsyncProjectRepository:
+    """Асинхронный доступ к данным проектов"""
+
+    @staticmethod
+    async def get_project(db: AsyncSession, project_id: int) -> Optional[Project]:
+        """Получить проект по ID"""
+        stmt = select(Project).where(Project.id == project_id)
+        return await db.scalar(ProjectRepository._with_leads_count(stmt))
+
+    @staticmethod
+    async def get_project_by_api_key(
+        db: AsyncSession, api_key: str
+    ) -> Optional[Project]:
+        """Получить проект по API ключу"""
+        stmt = select(Project).where(Project.api_key == api_key)
+        return await db.scalar(stmt)
@@ -0,0 +1,133 @@
+"""Репозиторий для счетчиков заявок по дням"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.enums import LeadStatus
+from app.models.lead import Lead, LeadDailyRollup
+
+# (project_id, день создания заявки, статус, изменение счетчика)
+RollupDelta = Tuple[int, date, LeadStatus, int]
+
+
+def lead_day(created_at: datetime) -> date:
+    """День создания заявки (UTC)"""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def lead_day_sql(dialect_name: str):
+    """День создания заявки (UTC) в SQL, как lead_day
+
+    В PostgreSQL created_at хранится с часовым поясом, и date() берет
+    день в поясе сессии, поэтому время сначала переводится в UTC.
+    """
+    if dialect_name == "postgresql":
+        return func.date(func.timezone(literal_column("'UTC'"), Lead.created_at))
+    return func.date(Lead.created_at)
+
+
+class LeadRollupRepository:
+    """Репозиторий для доступа к таблице lead_daily_rollup
+
+    Изменения применяются в транзакции вызывающего кода, commit не
+    выполняется (кроме полной перестройки).
+    """
+
+    @staticmethod
+    def apply(db: Session, deltas: Iterable[RollupDelta]) -> None:
+        """Применить изменения счетчиков"""
+        totals: Dict[Tuple[int, date, LeadStatus], int] = defaultdict(int)
+        for project_id, day, status, delta in deltas:
+            totals[(project_id, day, status)] += delta
+
+        rows = [
+            {"project_id": project_id, "day": day, "status": status, "count": delta}
+            for (project_id, day, status), delta in totals.items()
+            if delta
+        ]
+        if not rows:
+            return
+
+        if db.get_bind().dialect.name == "postgresql":
+            stmt = postgresql.insert(LeadDailyRollup)
+        else:
+            stmt = sqlite.insert(LeadDailyRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["project_id", "day", "status"],
+            set_={"count": LeadDailyRollup.count + stmt.excluded.count},
+        )
+        db.execute(stmt, rows)
+
+    @staticmethod
+    def get_stats(
+        db: Session,
+        project_id: Optional[int] = None,
+        project_ids: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """Получить статистику по заявкам из счетчиков"""
+        today = datetime.now(timezone.utc).date()
+        week_ago = today - timedelta(days=7)
+        month_ago = today - timedelta(days=30)
+
+        def count_since(day: date):
+            return func.coalesce(
+                func.sum(case((LeadDailyRollup.day >= day, LeadDailyRollup.count))),
+                0,
+            )
+
+        stmt = select(
+            LeadDailyRollup.status,
+            func.sum(LeadDailyRollup.count),
+            count_since(today),
+            count_since(week_ago),
+            count_since(month_ago),
+        ).group_by(LeadDailyRollup.status)
+        if project_id:
+            stmt = stmt.where(LeadDailyRollup.project_id == project_id)
+        if project_ids is not None:
+            stmt = stmt.where(LeadDailyRollup.project_id.in_(project_ids))
+
+        status_stats = {status.value: 0 for status in LeadStatus}
+        leads_today = leads_week = leads_month = 0
+        for status, count, today_count, week_count, month_count in db.execute(stmt):
+            status_stats[status.value] = count
+            leads_today += today_count
+            leads_week += week_count
+            leads_month += month_count
+        total = sum(status_stats.values())
+
+        # Конверсия
+        success_count = status_stats.get("success", 0)
+        conversion_rate = (success_count / total * 100) if total > 0 else 0
+
+        return {
+            "total_leads": total,
+            "leads_by_status": status_stats,
+            "leads_today": leads_today,
+            "leads_this_week": leads_week,
+            "leads_this_month": leads_month,
+            "conversion_rate": round(conversion_rate, 2),
+        }
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Пересчитать счетчики по всем заявкам, вернуть число строк"""
+        day = lead_day_sql(db.get_bind().dialect.name)
+        db.execute(delete(LeadDailyRollup))
+        result = db.execute(
+            insert(LeadDailyRollup).from_select(
+                ["project_id", "day", "status", "count"],
+                select(Lead.project_id, day, Lead.status, func.count(Lead.id)).group_by(
+                    Lead.project_id, day, Lead.status
+                ),
+            )
+        )
+        db.commit()
+        return result.rowcount
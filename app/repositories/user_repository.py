@@ -3,10 +3,12 @@
 from typing import List, Optional
 
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.auth import get_password_hash
-from app.models import User
+from app.cache import evict_user_principal
+from app.models import ProjectUser, User
 from app.schemas import UserCreate, UserUpdate
 
 
@@ -31,6 +33,12 @@ class UserRepository:
         stmt = select(User).where(User.username == username)
         return db.scalar(stmt)
 
+    @staticmethod
+    def get_user_project_ids(db: Session, user_id: int) -> List[int]:
+        """Получить ID проектов, назначенных пользователю"""
+        stmt = select(ProjectUser.project_id).where(ProjectUser.user_id == user_id)
+        return list(db.scalars(stmt).all())
+
     @staticmethod
     def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
         """Получить список пользователей"""
@@ -72,6 +80,7 @@ class UserRepository:
 
             db.commit()
             db.refresh(db_user)
+            evict_user_principal(user_id)
         return db_user
 
     @staticmethod
@@ -82,5 +91,28 @@ class UserRepository:
         if db_user:
             db.delete(db_user)
             db.commit()
+            evict_user_principal(user_id)
             return True
         return False
+
+
+class AsyncUserRepository:
+    """Асинхронный доступ к данным пользователей"""
+
+    @staticmethod
+    async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+        """Получить пользователя по ID"""
+        stmt = select(User).where(User.id == user_id)
+        return await db.scalar(stmt)
+
+    @staticmethod
+    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+        """Получить пользователя по email"""
+        stmt = select(User).where(User.email == email)
+        return await db.scalar(stmt)
+
+    @staticmethod
+    async def get_user_project_ids(db: AsyncSession, user_id: int) -> List[int]:
+        """Получить ID проектов, назначенных пользователю"""
+        stmt = select(ProjectUser.project_id).where(ProjectUser.user_id == user_id)
+        return list((await db.scalars(stmt)).all())
@@ -0,0 +1,117 @@
+"""Репозитории для очереди и логов вебхуков"""
+
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.webhook import WebhookLog, WebhookOutbox, WebhookPayload
+
+
+class WebhookOutboxRepository:
+    """Репозиторий для доступа к таблице webhook_outbox
+
+    Методы не выполняют commit: запись идет в транзакции заявки,
+    выборка и удаление - в транзакции relay.
+    """
+
+    @staticmethod
+    def add(db: Session, deliveries: Iterable[Tuple[int, int]]) -> None:
+        """Добавить события (project_id, lead_id)"""
+        rows = [
+            {"project_id": project_id, "lead_id": lead_id}
+            for project_id, lead_id in deliveries
+        ]
+        if rows:
+            db.execute(insert(WebhookOutbox), rows)
+
+    @staticmethod
+    def claim(db: Session, limit: int, after_id: int = 0) -> List[WebhookOutbox]:
+        """Выбрать самые старые события с id больше after_id
+
+        В PostgreSQL строки блокируются с SKIP LOCKED, поэтому несколько
+        relay не выберут одни и те же события.
+        """
+        stmt = (
+            select(WebhookOutbox)
+            .where(WebhookOutbox.id > after_id)
+            .order_by(WebhookOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(db.scalars(stmt).all())
+
+    @staticmethod
+    def delete(db: Session, outbox_ids: List[int]) -> None:
+        """Удалить обработанные события"""
+        if outbox_ids:
+            db.execute(delete(WebhookOutbox).where(WebhookOutbox.id.in_(outbox_ids)))
+
+
+class WebhookLogRepository:
+    """Репозиторий для доступа к логам вебхуков и их payload"""
+
+    @staticmethod
+    def store_payload(db: Session, payload: Any) -> str:
+        """Сохранить payload один раз и вернуть его hash (без commit)
+
+        У существующего payload обновляется created_at - время последнего
+        использования, чтобы очистка (delete_older_than) не удалила его
+        до записи ссылающегося лога.
+        """
+        raw = json.dumps(
+            payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+        ).encode()
+        payload_hash = hashlib.sha256(raw).hexdigest()
+        if settings.webhook_log_compress:
+            encoding, body = "zlib", zlib.compress(raw)
+        else:
+            encoding, body = "json", raw
+
+        if db.get_bind().dialect.name == "postgresql":
+            stmt = postgresql.insert(WebhookPayload)
+        else:
+            stmt = sqlite.insert(WebhookPayload)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["hash"], set_={"created_at": func.now()}
+            ),
+            {"hash": payload_hash, "encoding": encoding, "body": body},
+        )
+        return payload_hash
+
+    @staticmethod
+    def get_payload(db: Session, log: WebhookLog) -> Optional[Any]:
+        """Получить payload записи лога"""
+        if log.payload_hash is None:
+            return log.payload
+        stored = db.get(WebhookPayload, log.payload_hash)
+        if stored is None:
+            return None
+        body = stored.body
+        if stored.encoding == "zlib":
+            body = zlib.decompress(body)
+        return json.loads(body)
+
+    @staticmethod
+    def delete_older_than(db: Session, cutoff: datetime) -> int:
+        """Удалить логи старше cutoff и payload без ссылок (без commit)
+
+        Payload удаляется, только если он тоже использовался раньше cutoff:
+        только что сохраненный store_payload payload еще может ждать
+        запись своего лога в другой транзакции.
+        """
+        result = db.execute(delete(WebhookLog).where(WebhookLog.created_at < cutoff))
+        db.execute(
+            delete(WebhookPayload).where(
+                WebhookPayload.created_at < cutoff,
+                ~exists().where(WebhookLog.payload_hash == WebhookPayload.hash),
+            )
+        )
+        return result.rowcount
@@ -3,6 +3,8 @@
 from app.schemas.auth import GetTokenSchema, Token
 from app.schemas.leads import (
     DashboardStats,
+    LeadBulkUpdate,
+    LeadBulkUpdateResult,
     LeadCommentCreate,
     LeadCommentResponse,
     LeadCreate,
@@ -10,6 +12,9 @@ from app.schemas.leads import (
     LeadDetailResponse,
     LeadExport,
     LeadFilter,
+    LeadImportError,
+    LeadImportResult,
+    LeadPage,
     LeadResponse,
     LeadStatusHistoryResponse,
     LeadUpdate,
@@ -20,7 +25,13 @@ from app.schemas.projects import (
     ProjectUpdate,
     ProjectUserAssignment,
 )
-from app.schemas.users import UserCreate, UserLogin, UserResponse, UserUpdate
+from app.schemas.users import (
+    UserCreate,
+    UserLogin,
+    UserPrincipal,
+    UserResponse,
+    UserUpdate,
+)
 from app.schemas.webhooks import WebhookLogResponse
 
 __all__ = [
@@ -32,6 +43,7 @@ __all__ = [
     "UserUpdate",
     "UserResponse",
     "UserLogin",
+    "UserPrincipal",
     # Projects
     "ProjectCreate",
     "ProjectUpdate",
@@ -44,7 +56,12 @@ __all__ = [
     "LeadResponse",
     "LeadDetailResponse",
     "LeadFilter",
+    "LeadPage",
     "LeadExport",
+    "LeadBulkUpdate",
+    "LeadBulkUpdateResult",
+    "LeadImportError",
+    "LeadImportResult",
     "LeadCommentCreate",
     "LeadCommentResponse",
     "LeadStatusHistoryResponse",
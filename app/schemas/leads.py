@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import Annotated, Any, Dict, List, Optional
 
-from pydantic import EmailStr, Field, StringConstraints
+from pydantic import EmailStr, Field, StringConstraints, model_validator
 
 from app.models.lead import LeadStatus
 from app.schemas.base import BaseSchema
@@ -94,6 +94,14 @@ class LeadResponse(LeadBase):
     ] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int = 1  # версия заявки, она же ETag
+
+
+class LeadPage(BaseSchema):
+    """Страница заявок при пагинации по курсору"""
+
+    items: List[LeadResponse]
+    next_cursor: Optional[str] = None
 
 
 class LeadStatusHistoryResponse(BaseSchema):
@@ -140,6 +148,7 @@ class LeadFilter(BaseSchema):
     """Фильтры для поиска заявок"""
 
     project_id: Optional[int] = None
+    project_ids: Optional[List[int]] = None
     status: Optional[LeadStatus] = None
     assigned_to: Optional[int] = None
     priority: Optional[int] = None
@@ -157,6 +166,69 @@ class LeadExport(BaseSchema):
     filters: Optional[LeadFilter] = None
 
 
+class LeadBulkUpdate(BaseSchema):
+    """Массовое изменение заявок
+
+    Заявки задаются списком lead_ids или фильтром filters. Меняются только
+    переданные поля: assigned_to=null снимает ответственного.
+    """
+
+    lead_ids: Optional[Annotated[List[int], Field(min_length=1)]] = None
+    filters: Optional[LeadFilter] = None
+    assigned_to: Optional[int] = None
+    priority: Optional[int] = Field(None, ge=1, le=5)
+    status: Optional[LeadStatus] = None
+    comment: Optional[Annotated[str, StringConstraints(strip_whitespace=True)]] = (
+        None  # Комментарий к записи в истории статусов
+    )
+
+    @model_validator(mode="after")
+    def check_target_and_changes(self) -> "LeadBulkUpdate":
+        if (self.lead_ids is None) == (self.filters is None):
+            raise ValueError("Укажите lead_ids или filters")
+        if not self.changes():
+            raise ValueError("Укажите assigned_to, priority или status")
+        if "priority" in self.changes() and self.priority is None:
+            raise ValueError("priority не может быть пустым")
+        if "status" in self.changes() and self.status is None:
+            raise ValueError("status не может быть пустым")
+        return self
+
+    def changes(self) -> Dict[str, Any]:
+        """Изменяемые поля заявок"""
+        return {
+            field: getattr(self, field)
+            for field in ("assigned_to", "priority", "status")
+            if field in self.model_fields_set
+        }
+
+
+class LeadBulkUpdateResult(BaseSchema):
+    """Результат массового изменения заявок"""
+
+    updated: int
+    status_changed: int
+
+
+class LeadImportError(BaseSchema):
+    """Ошибка в строке импорта"""
+
+    row: int  # номер записи в файле, начиная с 1 (без заголовка CSV)
+    field: Optional[str] = None
+    message: str
+
+
+class LeadImportResult(BaseSchema):
+    """Результат импорта заявок"""
+
+    imported: int
+    failed: int
+    errors: List[LeadImportError]
+    errors_truncated: bool = False
+    # Ошибка сохранения пачки: импорт остановлен, imported - уже сохраненные
+    error: Optional[str] = None
+
+
 class DashboardStats(BaseSchema):
     """Схема статистики для дашборда"""
 
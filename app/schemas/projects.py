@@ -22,6 +22,8 @@ class ProjectBase(BaseSchema):
     )
     webhook_url: Optional[WebhookUrl] = None
     webhook_headers: Optional[Dict[str, str]] = None
+    webhook_batch_size: Annotated[int, Field(ge=1, le=1000)] = 1
+    webhook_batch_window_ms: Annotated[int, Field(ge=0, le=60000)] = 0
     custom_fields_schema: Optional[Dict[str, Any]] = None
     status_config: Optional[Dict[str, Any]] = None
 
@@ -45,6 +47,8 @@ class ProjectUpdate(BaseSchema):
     )
     webhook_url: Optional[WebhookUrl] = None
     webhook_headers: Optional[Dict[str, str]] = None
+    webhook_batch_size: Optional[Annotated[int, Field(ge=1, le=1000)]] = None
+    webhook_batch_window_ms: Optional[Annotated[int, Field(ge=0, le=60000)]] = None
     custom_fields_schema: Optional[Dict[str, Any]] = None
     status_config: Optional[Dict[str, Any]] = None
     is_active: Optional[bool] = None
@@ -1,7 +1,7 @@
 """Схемы для пользователей"""
 
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Annotated, FrozenSet, Optional
 
 from pydantic import EmailStr, StringConstraints
 
@@ -60,3 +60,16 @@ class UserLogin(BaseSchema):
 
     username: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
     password: Annotated[str, StringConstraints(min_length=6)]
+
+
+class UserPrincipal(BaseSchema):
+    """Аутентифицированный пользователь (снимок для кэша авторизации)"""
+
+    model_config = {"from_attributes": True, "frozen": True}
+
+    id: int
+    email: str
+    username: str
+    role: UserRole
+    is_active: bool
+    project_ids: FrozenSet[int] = frozenset()
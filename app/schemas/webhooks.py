@@ -1,7 +1,7 @@
 """Схемы для вебхуков"""
 
 from datetime import datetime
-from typing import Annotated, Optional
+from typing import Annotated, Any, Dict, List, Optional
 
 from pydantic import StringConstraints
 
@@ -24,4 +24,7 @@ class WebhookLogResponse(BaseSchema):
     ] = None
     attempt: int
     is_success: bool
+    lead_id: Optional[int] = None
+    lead_results: Optional[List[Dict[str, Any]]] = None
+    payload_hash: Optional[str] = None
     created_at: datetime
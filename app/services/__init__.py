@@ -1,7 +1,16 @@
 """Сервисы для бизнес-логики (Business Logic Layer)"""
 
-from app.services.lead_service import LeadService
+from app.services.lead_export import LeadExportService
+from app.services.lead_import import LeadImportService
+from app.services.lead_service import AsyncLeadService, LeadService
 from app.services.project_service import ProjectService
 from app.services.user_service import UserService
 
-__all__ = ["UserService", "ProjectService", "LeadService"]
+__all__ = [
+    "UserService",
+    "ProjectService",
+    "LeadService",
+    "AsyncLeadService",
+    "LeadExportService",
+    "LeadImportService",
+]
@@ -0,0 +1,67 @@
+"""Область доступа пользователя к проектам"""
+
+from typing import FrozenSet, List, Optional
+
+from app.models.enums import UserRole
+from app.schemas import LeadFilter, UserPrincipal
+
+
+class AccessScope:
+    """Проекты, доступные пользователю
+
+    Строится один раз из данных аутентифицированного пользователя
+    (ProjectUser.project_id), без обращения к связанным проектам.
+    project_ids=None означает доступ ко всем проектам.
+    """
+
+    def __init__(self, project_ids: Optional[FrozenSet[int]] = None):
+        self.project_ids = project_ids
+
+    @classmethod
+    def for_user(cls, user: Optional[UserPrincipal]) -> "AccessScope":
+        """Область доступа пользователя (без пользователя - без ограничений)"""
+        if user is None or user.role == UserRole.ADMIN:
+            return cls()
+        return cls(frozenset(user.project_ids))
+
+    @property
+    def is_unrestricted(self) -> bool:
+        """Доступны ли все проекты"""
+        return self.project_ids is None
+
+    def can_access(self, project_id: int) -> bool:
+        """Проверить доступ к проекту"""
+        return self.is_unrestricted or project_id in self.project_ids
+
+    def visible_project_ids(
+        self, project_id: Optional[int] = None
+    ) -> Optional[List[int]]:
+        """Проекты, по которым можно строить выборку
+
+        None - ограничений нет, пустой список - доступных проектов нет.
+        """
+        if project_id:
+            return [project_id] if self.can_access(project_id) else []
+        if self.is_unrestricted:
+            return None
+        return sorted(self.project_ids)
+
+    def restrict_filters(self, filters: Optional[LeadFilter]) -> Optional[LeadFilter]:
+        """Ограничить фильтры заявок доступными проектами
+
+        Возвращает None, если под фильтр не попадает ни один доступный проект.
+        """
+        if self.is_unrestricted:
+            return filters
+
+        filters = filters.model_copy() if filters else LeadFilter()
+        if filters.project_id:
+            return filters if self.can_access(filters.project_id) else None
+
+        project_ids = self.project_ids
+        if filters.project_ids is not None:
+            project_ids = project_ids & set(filters.project_ids)
+        if not project_ids:
+            return None
+        filters.project_ids = sorted(project_ids)
+        return filters
@@ -0,0 +1,163 @@
+"""Потоковая выгрузка заявок в CSV и XLSX"""
+
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Iterator, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import ReadSessionLocal
+from app.models.lead import Lead
+from app.repositories.lead_repository import LeadRepository
+from app.schemas import LeadExport, LeadFilter, UserPrincipal
+from app.services.access import AccessScope
+
+# Колонки выгрузки: заголовок и поле заявки
+EXPORT_COLUMNS = [
+    ("id", Lead.id),
+    ("project_id", Lead.project_id),
+    ("name", Lead.name),
+    ("phone", Lead.phone),
+    ("email", Lead.email),
+    ("message", Lead.message),
+    ("status", Lead.status),
+    ("priority", Lead.priority),
+    ("assigned_to", Lead.assigned_to),
+    ("utm_source", Lead.utm_source),
+    ("utm_medium", Lead.utm_medium),
+    ("utm_campaign", Lead.utm_campaign),
+    ("utm_term", Lead.utm_term),
+    ("utm_content", Lead.utm_content),
+    ("custom_fields", Lead.custom_fields),
+    ("created_at", Lead.created_at),
+    ("updated_at", Lead.updated_at),
+]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Размер куска ответа при отдаче готового XLSX файла
+XLSX_CHUNK_SIZE = 64 * 1024
+
+# Начало строки, с которого табличный редактор читает ячейку как формулу
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def escape_formula(value: str) -> str:
+    """Экранировать апострофом значение, похожее на формулу
+
+    Имя, сообщение и другие поля заявки приходят от посетителей сайта,
+    и "=HYPERLINK(...)" в выгрузке иначе стал бы формулой.
+    """
+    if value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def unescape_formula(value: str) -> str:
+    """Снять экранирование escape_formula (при импорте выгрузки)"""
+    if value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        value = json.dumps(value, ensure_ascii=False)
+    if isinstance(value, str):
+        return escape_formula(value)
+    return value
+
+
+def _xlsx_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        # Excel не хранит часовой пояс, время выгружается в UTC
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    value = _csv_value(value)
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+class LeadExportService:
+    """Сервис выгрузки заявок
+
+    Выгрузка отдается генератором для StreamingResponse и живет дольше
+    запроса, поэтому открывает собственную сессию (с реплики, если она
+    настроена). Строки читаются из курсора пачками, в памяти держится
+    только текущая пачка.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = ReadSessionLocal):
+        self.session_factory = session_factory
+
+    def export(
+        self, export: LeadExport, user: Optional[UserPrincipal] = None
+    ) -> Iterator[bytes]:
+        """Выгрузка заявок в формате export.format"""
+        # Ограничиваем выгрузку проектами, доступными пользователю
+        filters = AccessScope.for_user(user).restrict_filters(
+            export.filters or LeadFilter()
+        )
+        if export.format == "xlsx":
+            return self._xlsx(filters)
+        return self._csv(filters)
+
+    def _rows(self, filters: Optional[LeadFilter]) -> Iterator[tuple]:
+        if filters is None:
+            return
+        db = self.session_factory()
+        try:
+            yield from LeadRepository.iter_export_rows(
+                db,
+                [column for _, column in EXPORT_COLUMNS],
+                filters=filters,
+                batch_size=settings.lead_export_batch_size,
+            )
+        finally:
+            db.close()
+
+    def _csv(self, filters: Optional[LeadFilter]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM, чтобы Excel открыл файл в UTF-8
+        buffer.write("\ufeff")
+        writer.writerow([name for name, _ in EXPORT_COLUMNS])
+
+        for count, row in enumerate(self._rows(filters), start=1):
+            writer.writerow([_csv_value(value) for value in row])
+            if count % settings.lead_export_batch_size == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode()
+
+    def _xlsx(self, filters: Optional[LeadFilter]) -> Iterator[bytes]:
+        # XLSX - zip архив, он собирается во временном файле в режиме
+        # write_only (строки сразу пишутся на диск) и затем отдается кусками
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Заявки")
+        sheet.append([name for name, _ in EXPORT_COLUMNS])
+        for row in self._rows(filters):
+            sheet.append([_xlsx_value(value) for value in row])
+
+        with tempfile.TemporaryFile() as file:
+            workbook.save(file)
+            file.seek(0)
+            while chunk := file.read(XLSX_CHUNK_SIZE):
+                yield chunk
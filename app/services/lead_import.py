@@ -0,0 +1,196 @@
+"""Пакетный импорт заявок из CSV и NDJSON"""
+
+import csv
+import io
+import json
+import logging
+from contextlib import closing
+from itertools import batched
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.repositories.lead_repository import LeadRepository
+from app.repositories.project_repository import ProjectRepository
+from app.schemas import (
+    LeadCreate,
+    LeadCreateExternal,
+    LeadImportError,
+    LeadImportResult,
+    UserPrincipal,
+)
+from app.services.access import AccessScope
+from app.services.lead_export import unescape_formula
+
+logger = logging.getLogger("lead_import")
+
+# Поля заявки, которые берутся из файла (проект задается в запросе)
+IMPORT_FIELDS = frozenset(LeadCreateExternal.model_fields)
+
+# Проверка пачки строк одним вызовом валидатора
+LEADS_ADAPTER = TypeAdapter(List[LeadCreate])
+
+# (номер записи, поля заявки или ошибка разбора)
+ImportRecord = Tuple[int, Dict[str, Any] | LeadImportError]
+
+
+class LeadImportService:
+    """Сервис импорта заявок
+
+    Файл читается потоком и обрабатывается пачками по
+    lead_import_chunk_size строк: пачка проверяется схемой LeadCreate
+    одним вызовом, корректные строки вставляются одной транзакцией
+    (LeadRepository.import_leads), ошибки копятся по номерам строк.
+    Вебхуки по импортированным заявкам не отправляются.
+
+    Пачки сохраняются независимо: если запись пачки падает, она
+    откатывается, импорт останавливается, а в результате остаются
+    imported уже сохраненных пачек и error с номером первой
+    несохраненной строки.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.project_repository = ProjectRepository()
+
+    def import_leads(
+        self,
+        project_id: int,
+        file: BinaryIO,
+        format: str = "csv",
+        user: Optional[UserPrincipal] = None,
+    ) -> LeadImportResult:
+        """Импортировать заявки из файла в проект"""
+        # Доступ и проект проверяются один раз на весь файл
+        if not AccessScope.for_user(user).can_access(project_id):
+            raise ValueError("Недостаточно прав доступа к проекту")
+        if not self.project_repository.get_project(self.db, project_id):
+            raise ValueError("Проект не найден")
+
+        records = (
+            self._read_ndjson(file) if format == "ndjson" else self._read_csv(file)
+        )
+        result = LeadImportResult(imported=0, failed=0, errors=[])
+        # Чтение закрывается сразу: при остановке импорта генератор иначе
+        # закрыл бы сборщик мусора, когда загруженный файл уже закрыт
+        with closing(records):
+            for chunk in batched(records, max(settings.lead_import_chunk_size, 1)):
+                leads = self._validate_chunk(project_id, chunk, result)
+                try:
+                    result.imported += LeadRepository.import_leads(self.db, leads)
+                except (SQLAlchemyError, RuntimeError):
+                    self.db.rollback()
+                    first_row = chunk[0][0]
+                    logger.exception(
+                        "Не удалось сохранить пачку импорта со строки %s", first_row
+                    )
+                    result.error = (
+                        f"Не удалось сохранить строки начиная с {first_row}, "
+                        "импорт остановлен"
+                    )
+                    break
+        return result
+
+    @staticmethod
+    def _read_csv(file: BinaryIO) -> Iterator[ImportRecord]:
+        """Строки CSV с заголовком, пустые ячейки считаются пустыми полями
+
+        Экранирование формул из выгрузки (escape_formula) снимается,
+        поэтому файл /leads/export импортируется без изменений значений.
+        """
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        try:
+            for number, row in enumerate(csv.DictReader(text), start=1):
+                data = {
+                    key: unescape_formula(value)
+                    for key, value in row.items()
+                    if key in IMPORT_FIELDS and value not in ("", None)
+                }
+                # custom_fields в CSV хранится как JSON (как в выгрузке)
+                if "custom_fields" in data:
+                    try:
+                        data["custom_fields"] = json.loads(data["custom_fields"])
+                    except ValueError:
+                        yield number, LeadImportError(
+                            row=number,
+                            field="custom_fields",
+                            message="Некорректный JSON",
+                        )
+                        continue
+                yield number, data
+        except UnicodeDecodeError:
+            raise ValueError("Файл должен быть в кодировке UTF-8")
+        finally:
+            text.detach()
+
+    @staticmethod
+    def _read_ndjson(file: BinaryIO) -> Iterator[ImportRecord]:
+        """Строки NDJSON: один JSON объект на строку, пустые строки пропускаются"""
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield number, LeadImportError(row=number, message="Некорректный JSON")
+                continue
+            if not isinstance(data, dict):
+                yield number, LeadImportError(
+                    row=number, message="Ожидается JSON объект"
+                )
+                continue
+            yield number, {
+                key: value for key, value in data.items() if key in IMPORT_FIELDS
+            }
+
+    @staticmethod
+    def _validate_chunk(
+        project_id: int, chunk: Tuple[ImportRecord, ...], result: LeadImportResult
+    ) -> List[LeadCreate]:
+        """Проверить пачку строк, ошибки записать в result"""
+        # Ошибки по номерам записей
+        failed: Dict[int, List[LeadImportError]] = {}
+        numbers = []
+        rows = []
+        for number, data in chunk:
+            if isinstance(data, LeadImportError):
+                failed[number] = [data]
+                continue
+            numbers.append(number)
+            rows.append({**data, "project_id": project_id})
+
+        try:
+            leads = LEADS_ADAPTER.validate_python(rows)
+        except ValidationError as exc:
+            # loc ошибки начинается с индекса строки в пачке
+            invalid = set()
+            for error in exc.errors(include_url=False, include_input=False):
+                index, *field = error["loc"]
+                invalid.add(index)
+                failed.setdefault(numbers[index], []).append(
+                    LeadImportError(
+                        row=numbers[index],
+                        field=".".join(str(part) for part in field) or None,
+                        message=error["msg"],
+                    )
+                )
+            # Повторно проверяются только строки без ошибок
+            leads = LEADS_ADAPTER.validate_python(
+                [row for index, row in enumerate(rows) if index not in invalid]
+            )
+
+        for number in sorted(failed):
+            LeadImportService._add_errors(result, failed[number])
+        return leads
+
+    @staticmethod
+    def _add_errors(result: LeadImportResult, errors: List[LeadImportError]) -> None:
+        """Учесть ошибочную строку, сохранив не больше lead_import_max_errors"""
+        result.failed += 1
+        room = settings.lead_import_max_errors - len(result.errors)
+        if len(errors) > room:
+            result.errors_truncated = True
+        result.errors.extend(errors[: max(room, 0)])
@@ -0,0 +1,144 @@
+"""Очередь пакетного приема заявок (group commit)"""
+
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.database import SessionLocal
+from app.repositories.lead_repository import LeadRepository
+from app.schemas import LeadCreate, LeadResponse
+
+logger = logging.getLogger("lead_ingest")
+
+# (заявка, ip_address, user_agent, referrer, notify_webhook)
+IngestItem = Tuple[LeadCreate, Optional[str], Optional[str], Optional[str], bool]
+
+
+class LeadIngestQueue:
+    """Собирает заявки конкурентных запросов и пишет их одной транзакцией
+
+    Пачка закрывается по истечении окна ожидания или при достижении
+    максимального размера. Каждый запрос получает свой LeadResponse
+    через future после commit всей пачки.
+    """
+
+    def __init__(self, window_ms: int, batch_size: int):
+        self.window = window_ms / 1000
+        self.batch_size = max(batch_size, 1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Запущен ли фоновый обработчик очереди"""
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        """Запустить фоновый обработчик очереди"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Записать накопленные заявки и остановить обработчик"""
+        if not self.is_running:
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+
+    async def submit(
+        self,
+        lead: LeadCreate,
+        ip_address: str = None,
+        user_agent: str = None,
+        referrer: str = None,
+        notify_webhook: bool = False,
+    ) -> LeadResponse:
+        """Поставить заявку в очередь и дождаться ее записи"""
+        if not self.is_running:
+            raise RuntimeError("Очередь приема заявок не запущена")
+        future = asyncio.get_running_loop().create_future()
+        item = (lead, ip_address, user_agent, referrer, notify_webhook)
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = await self._queue.get()
+            if entry is None:
+                return
+
+            batch = [entry]
+            stopping = False
+            deadline = loop.time() + self.window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Tuple[IngestItem, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        try:
+            responses = await asyncio.to_thread(self._write, items)
+        except Exception:
+            # Одна некорректная заявка не должна ронять всю пачку:
+            # пишем заявки по одной и отдаем ошибку только ее владельцу
+            logger.exception("Не удалось записать пачку из %s заявок", len(items))
+            for item, future in batch:
+                try:
+                    response = await asyncio.to_thread(self._write, [item])
+                except Exception as exc:
+                    self._resolve(future, exception=exc)
+                else:
+                    self._resolve(future, result=response[0])
+            return
+
+        for (_, future), response in zip(batch, responses):
+            self._resolve(future, result=response)
+
+    @staticmethod
+    def _resolve(
+        future: asyncio.Future,
+        result: Optional[LeadResponse] = None,
+        exception: Optional[Exception] = None,
+    ) -> None:
+        # Клиент мог отключиться, не дождавшись ответа
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    @staticmethod
+    def _write(items: List[IngestItem]) -> List[LeadResponse]:
+        db = SessionLocal()
+        try:
+            return LeadRepository.ingest_leads(db, items)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+lead_ingest_queue = LeadIngestQueue(
+    window_ms=settings.lead_ingest_batch_window_ms,
+    batch_size=settings.lead_ingest_batch_size,
+)
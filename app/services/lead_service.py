@@ -1,22 +1,37 @@
 """Сервис для работы с заявками"""
 
-from typing import List, Optional
+import base64
+import json
+from datetime import datetime
+from typing import AbstractSet, List, Optional, Tuple
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
+from app.config import settings
 from app.models.enums import LeadStatus
 from app.models.lead import Lead
-from app.models.user import User, UserRole
-from app.repositories.lead_repository import LeadRepository
+from app.repositories.lead_repository import AsyncLeadRepository, LeadRepository
 from app.repositories.project_repository import ProjectRepository
 from app.schemas import (
     DashboardStats,
+    LeadBulkUpdate,
+    LeadBulkUpdateResult,
     LeadCommentCreate,
     LeadCommentResponse,
     LeadCreate,
     LeadFilter,
+    LeadPage,
+    LeadResponse,
     LeadUpdate,
+    UserPrincipal,
 )
+from app.services.access import AccessScope
+
+
+class LeadVersionConflict(ValueError):
+    """Заявка изменена другим пользователем (версия не совпала)"""
 
 
 class LeadService:
@@ -31,49 +46,77 @@ class LeadService:
         """Получить заявку по ID"""
         return self.repository.get_lead(self.db, lead_id)
 
+    def get_lead_detail(self, lead_id: int) -> Optional[Lead]:
+        """Получить заявку с проектом, историей и комментариями"""
+        return self.repository.get_lead_detail(self.db, lead_id)
+
     def get_leads(
         self,
         filters: Optional[LeadFilter] = None,
         skip: int = 0,
         limit: int = 100,
-        user: Optional[User] = None,
+        user: Optional[UserPrincipal] = None,
     ) -> List[Lead]:
         """Получить список заявок с фильтрацией"""
-        # Если пользователь не админ, ограничиваем доступ только к его проектам
-        if user and user.role != UserRole.ADMIN:
-            user_projects = [
-                assignment.project.id for assignment in user.project_assignments
-            ]
-            if filters and filters.project_id:
-                if filters.project_id not in user_projects:
-                    return []
-            elif not filters:
-                filters = LeadFilter()
-            elif not filters.project_id:
-                if not user_projects:
-                    return []
-                filters.project_id = user_projects[0]
+        # Ограничиваем выборку проектами, доступными пользователю
+        filters = AccessScope.for_user(user).restrict_filters(filters)
+        if filters is None:
+            return []
 
         return self.repository.get_leads(
             self.db, filters=filters, skip=skip, limit=limit
         )
 
+    def get_leads_page(
+        self,
+        filters: Optional[LeadFilter] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        user: Optional[UserPrincipal] = None,
+    ) -> LeadPage:
+        """Получить страницу заявок по курсору"""
+        after = self._decode_cursor(cursor) if cursor else None
+        filters = AccessScope.for_user(user).restrict_filters(filters)
+        if filters is None:
+            return LeadPage(items=[])
+
+        # Берем на одну заявку больше, чтобы понять, есть ли следующая страница
+        leads = self.repository.get_leads_after(
+            self.db, filters=filters, after=after, limit=limit + 1
+        )
+        next_cursor = None
+        if len(leads) > limit:
+            leads = leads[:limit]
+            next_cursor = self._encode_cursor(leads[-1])
+        return LeadPage(items=leads, next_cursor=next_cursor)
+
+    @staticmethod
+    def _encode_cursor(lead: Lead) -> str:
+        """Закодировать ключ заявки в непрозрачный курсор"""
+        raw = json.dumps([lead.created_at.isoformat(), lead.id])
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Раскодировать курсор в ключ заявки"""
+        try:
+            created_at, lead_id = json.loads(base64.urlsafe_b64decode(cursor))
+            return datetime.fromisoformat(created_at), int(lead_id)
+        except (ValueError, TypeError):
+            raise ValueError("Некорректный курсор")
+
     def create_lead(
         self,
         lead: LeadCreate,
         ip_address: str = None,
         user_agent: str = None,
         referrer: str = None,
-        user: Optional[User] = None,
+        user: Optional[UserPrincipal] = None,
     ) -> Lead:
         """Создать новую заявку"""
         # Проверяем доступ к проекту
-        if user and user.role != UserRole.ADMIN:
-            user_projects = [
-                assignment.project.id for assignment in user.project_assignments
-            ]
-            if lead.project_id not in user_projects:
-                raise ValueError("Недостаточно прав доступа к проекту")
+        if not AccessScope.for_user(user).can_access(lead.project_id):
+            raise ValueError("Недостаточно прав доступа к проекту")
 
         # Проверяем, что проект существует
         project = self.project_repository.get_project(self.db, lead.project_id)
@@ -86,75 +129,139 @@ class LeadService:
             user_agent=user_agent,
             referrer=referrer,
         )
-        
+
         return lead
 
+    def ingest_lead(
+        self,
+        lead: LeadCreate,
+        ip_address: str = None,
+        user_agent: str = None,
+        referrer: str = None,
+        notify_webhook: bool = False,
+    ) -> LeadResponse:
+        """Принять заявку из внешнего API
+
+        Проект уже проверен по API ключу, поэтому повторный поиск проекта
+        не выполняется, а заявка пишется одной транзакцией вместе с
+        событием вебхука (notify_webhook).
+        """
+        return self.repository.ingest_lead(
+            self.db,
+            lead,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            referrer=referrer,
+            notify_webhook=notify_webhook,
+        )
+
     def update_lead(
         self,
         lead_id: int,
         lead_update: LeadUpdate | LeadStatus,
-        user: Optional[User] = None,
-    ) -> Optional[Lead]:
-        """Обновить заявку"""
+        user: Optional[UserPrincipal] = None,
+        expected_versions: Optional[AbstractSet[int]] = None,
+    ) -> LeadResponse:
+        """Обновить заявку
+
+        expected_versions - допустимые версии заявки (из If-Match), None -
+        без условия. Блокировки не берутся: конфликт обнаруживается по
+        версии при загрузке или при UPDATE и дает LeadVersionConflict.
+        """
         lead = self.repository.get_lead(self.db, lead_id)
         if not lead:
             raise ValueError("Заявка не найдена")
 
         # Проверяем доступ
-        if user and user.role != UserRole.ADMIN:
-            user_projects = [
-                assignment.project.id for assignment in user.project_assignments
-            ]
-            if lead.project_id not in user_projects:
-                raise ValueError("Недостаточно прав доступа к заявке")
+        if not AccessScope.for_user(user).can_access(lead.project_id):
+            raise ValueError("Недостаточно прав доступа к заявке")
+
+        if expected_versions is not None and lead.version not in expected_versions:
+            raise LeadVersionConflict("Заявка изменена другим пользователем")
 
+        # Заявка уже загружена - репозиторий меняет ее без повторного SELECT
         changed_by = user.id if user else None
-        return self.repository.update_lead(
-            self.db, lead_id, lead_update, changed_by=changed_by
-        )
+        try:
+            return self.repository.update_lead(
+                self.db, lead, lead_update, changed_by=changed_by
+            )
+        except StaleDataError:
+            self.db.rollback()
+            raise LeadVersionConflict("Заявка изменена другим пользователем")
 
     def update_lead_status(
         self,
         lead_id: int,
-        new_status: str,
-        user: Optional[User] = None,
-    ) -> Optional[Lead]:
-        """Обновить заявку"""
-        lead = self.repository.get_lead(self.db, lead_id)
-        if not lead:
-            raise ValueError("Заявка не найдена")
+        new_status: LeadStatus,
+        user: Optional[UserPrincipal] = None,
+        expected_versions: Optional[AbstractSet[int]] = None,
+    ) -> LeadResponse:
+        """Обновить статус заявки"""
+        return self.update_lead(
+            lead_id,
+            LeadStatus(new_status),
+            user=user,
+            expected_versions=expected_versions,
+        )
 
-        # Проверяем доступ
-        if user and user.role != UserRole.ADMIN:
-            user_projects = [
-                assignment.project.id for assignment in user.project_assignments
-            ]
-            if lead.project_id not in user_projects:
-                raise ValueError("Недостаточно прав доступа к заявке")
+    def bulk_update_leads(
+        self, bulk: LeadBulkUpdate, user: Optional[UserPrincipal] = None
+    ) -> LeadBulkUpdateResult:
+        """Массово изменить ответственного, приоритет или статус заявок"""
+        scope = AccessScope.for_user(user)
+        limit = settings.lead_bulk_update_max
 
-        changed_by = user.id if user else None
-        return self.repository.update_lead(
-            self.db, lead_id, new_status, changed_by=changed_by
+        if bulk.lead_ids is not None:
+            lead_ids = set(bulk.lead_ids)
+            if len(lead_ids) > limit:
+                raise ValueError(f"За один запрос можно изменить до {limit} заявок")
+            leads = self.repository.get_lead_keys(self.db, lead_ids=lead_ids)
+            missing = lead_ids - {lead.id for lead in leads}
+            if missing:
+                raise ValueError(
+                    "Заявки не найдены: " + ", ".join(map(str, sorted(missing)))
+                )
+            # Доступ проверяется один раз по всем проектам выборки
+            project_ids = {lead.project_id for lead in leads}
+            if not all(scope.can_access(project_id) for project_id in project_ids):
+                raise ValueError("Недостаточно прав доступа к заявкам")
+        else:
+            filters = scope.restrict_filters(bulk.filters)
+            if filters is None:
+                return LeadBulkUpdateResult(updated=0, status_changed=0)
+            leads = self.repository.get_lead_keys(
+                self.db, filters=filters, limit=limit + 1
+            )
+            if len(leads) > limit:
+                raise ValueError(f"Под фильтр попадает больше {limit} заявок")
+
+        updated, status_changed = self.repository.bulk_update_leads(
+            self.db,
+            leads,
+            bulk.changes(),
+            changed_by=user.id if user else None,
+            comment=bulk.comment,
         )
+        return LeadBulkUpdateResult(updated=updated, status_changed=status_changed)
 
-    def delete_lead(self, lead_id: int, user: Optional[User] = None) -> bool:
+    def delete_lead(self, lead_id: int, user: Optional[UserPrincipal] = None) -> bool:
         """Удалить заявку"""
         lead = self.repository.get_lead(self.db, lead_id)
         if not lead:
             raise ValueError("Заявка не найдена")
 
         # Проверяем доступ
-        if user and user.role != UserRole.ADMIN:
-            user_projects = [
-                assignment.project.id for assignment in user.project_assignments
-            ]
-            if lead.project_id not in user_projects:
-                raise ValueError("Недостаточно прав доступа к заявке")
+        if not AccessScope.for_user(user).can_access(lead.project_id):
+            raise ValueError("Недостаточно прав доступа к заявке")
 
-        return self.repository.delete_lead(self.db, lead_id)
+        try:
+            return self.repository.delete_lead(self.db, lead_id)
+        except StaleDataError:
+            self.db.rollback()
+            raise LeadVersionConflict("Заявка изменена другим пользователем")
 
     def add_comment(
-        self, lead_id: int, comment_data: LeadCommentCreate, user: User
+        self, lead_id: int, comment_data: LeadCommentCreate, user: UserPrincipal
     ) -> LeadCommentResponse:
         """Добавить комментарий к заявке"""
         lead = self.repository.get_lead(self.db, lead_id)
@@ -162,12 +269,8 @@ class LeadService:
             raise ValueError("Заявка не найдена")
 
         # Проверяем доступ
-        if user.role != UserRole.ADMIN:
-            user_projects = [
-                assignment.project.id for assignment in user.project_assignments
-            ]
-            if lead.project_id not in user_projects:
-                raise ValueError("Недостаточно прав доступа к заявке")
+        if not AccessScope.for_user(user).can_access(lead.project_id):
+            raise ValueError("Недостаточно прав доступа к заявке")
 
         comment = self.repository.add_comment(self.db, lead_id, comment_data, user.id)
         if not comment:
@@ -176,27 +279,100 @@ class LeadService:
         return comment
 
     def get_dashboard_stats(
-        self, project_id: Optional[int] = None, user: Optional[User] = None
+        self, project_id: Optional[int] = None, user: Optional[UserPrincipal] = None
     ) -> DashboardStats:
         """Получить статистику для дашборда"""
         # Если пользователь не админ, ограничиваем доступ только к его проектам
-        if user and user.role != UserRole.ADMIN:
-            user_projects = [
-                assignment.project.id for assignment in user.project_assignments
-            ]
-            if project_id and project_id not in user_projects:
-                raise ValueError("Недостаточно прав доступа к проекту")
-            elif not project_id and len(user_projects) == 1:
-                project_id = user_projects[0]
-
-        stats = self.repository.get_lead_stats(self.db, project_id=project_id)
+        scope = AccessScope.for_user(user)
+        if project_id and not scope.can_access(project_id):
+            raise ValueError("Недостаточно прав доступа к проекту")
+
+        stats = self.repository.get_lead_stats(
+            self.db, project_ids=scope.visible_project_ids(project_id)
+        )
         return DashboardStats(**stats)
 
-    def check_user_access(self, user: User, lead: Lead) -> bool:
+    def check_user_access(self, user: UserPrincipal, lead: Lead) -> bool:
         """Проверить доступ пользователя к заявке"""
-        if user.role == UserRole.ADMIN:
-            return True
-        user_projects = [
-            assignment.project.id for assignment in user.project_assignments
-        ]
-        return lead.project_id in user_projects
+        return AccessScope.for_user(user).can_access(lead.project_id)
+
+
+class AsyncLeadService:
+    """Асинхронный сервис заявок для нагруженных маршрутов
+
+    Прием заявок внешнего API, список заявок и статистика дашборда.
+    Правила доступа и формат курсора общие с LeadService.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = AsyncLeadRepository()
+
+    async def get_leads(
+        self,
+        filters: Optional[LeadFilter] = None,
+        skip: int = 0,
+        limit: int = 100,
+        user: Optional[UserPrincipal] = None,
+    ) -> List[Lead]:
+        """Получить список заявок с фильтрацией"""
+        filters = AccessScope.for_user(user).restrict_filters(filters)
+        if filters is None:
+            return []
+
+        return await self.repository.get_leads(
+            self.db, filters=filters, skip=skip, limit=limit
+        )
+
+    async def get_leads_page(
+        self,
+        filters: Optional[LeadFilter] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        user: Optional[UserPrincipal] = None,
+    ) -> LeadPage:
+        """Получить страницу заявок по курсору"""
+        after = LeadService._decode_cursor(cursor) if cursor else None
+        filters = AccessScope.for_user(user).restrict_filters(filters)
+        if filters is None:
+            return LeadPage(items=[])
+
+        leads = await self.repository.get_leads_after(
+            self.db, filters=filters, after=after, limit=limit + 1
+        )
+        next_cursor = None
+        if len(leads) > limit:
+            leads = leads[:limit]
+            next_cursor = LeadService._encode_cursor(leads[-1])
+        return LeadPage(items=leads, next_cursor=next_cursor)
+
+    async def ingest_lead(
+        self,
+        lead: LeadCreate,
+        ip_address: str = None,
+        user_agent: str = None,
+        referrer: str = None,
+        notify_webhook: bool = False,
+    ) -> LeadResponse:
+        """Принять заявку из внешнего API"""
+        return await self.repository.ingest_lead(
+            self.db,
+            lead,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            referrer=referrer,
+            notify_webhook=notify_webhook,
+        )
+
+    async def get_dashboard_stats(
+        self, project_id: Optional[int] = None, user: Optional[UserPrincipal] = None
+    ) -> DashboardStats:
+        """Получить статистику для дашборда"""
+        scope = AccessScope.for_user(user)
+        if project_id and not scope.can_access(project_id):
+            raise ValueError("Недостаточно прав доступа к проекту")
+
+        stats = await self.repository.get_lead_stats(
+            self.db, project_ids=scope.visible_project_ids(project_id)
+        )
+        return DashboardStats(**stats)
@@ -4,10 +4,11 @@ from typing import List, Optional
 
 from sqlalchemy.orm import Session
 
-from app.models import Project, User
+from app.models import Project
 from app.repositories.project_repository import ProjectRepository
 from app.repositories.user_repository import UserRepository
-from app.schemas import ProjectCreate, ProjectUpdate
+from app.schemas import ProjectCreate, ProjectUpdate, UserPrincipal
+from app.services.access import AccessScope
 
 
 class ProjectService:
@@ -30,11 +31,16 @@ class ProjectService:
         """Получить список проектов"""
         return self.repository.get_projects(self.db, skip=skip, limit=limit)
 
-    def get_user_projects(self, user: User) -> List[Project]:
+    def get_user_projects(
+        self, user: UserPrincipal, skip: int = 0, limit: int = 100
+    ) -> List[Project]:
         """Получить проекты пользователя"""
-        if user.role.value == "admin":
-            return self.get_projects()
-        return [(assignment.project, len(assignment.project.leads)) for assignment in user.project_assignments]
+        scope = AccessScope.for_user(user)
+        if scope.is_unrestricted:
+            return self.get_projects(skip=skip, limit=limit)
+        return self.repository.get_projects_by_ids(
+            self.db, scope.project_ids, skip=skip, limit=limit
+        )
 
     def create_project(self, project: ProjectCreate) -> Project:
         """Создать новый проект"""
@@ -68,10 +74,7 @@ class ProjectService:
         """Удалить пользователя из проекта"""
         return self.repository.remove_user_from_project(self.db, project_id, user_id)
 
-    def check_user_access(self, user: User, project_id: int) -> bool:
+    def check_user_access(self, user: UserPrincipal, project_id: int) -> bool:
         """Проверить доступ пользователя к проекту"""
-        if user.role.value == "admin":
-            return True
-        user_projects = [assignment.project.id for assignment in user.project_assignments]
-        return project_id in user_projects
+        return AccessScope.for_user(user).can_access(project_id)
 
@@ -1,12 +1,26 @@
-from typing import Any, Dict
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Sequence, Tuple
 
-import httpx
-from sqlalchemy import delete, select
+from sqlalchemy import select
 
 from app.celery_app import celery_app
 from app.config import settings
 from app.database import SessionLocal
-from app.models import Lead, Project, WebhookLog
+from app.models import Lead, Project, WebhookLog, WebhookOutbox
+from app.repositories.webhook_repository import (
+    WebhookLogRepository,
+    WebhookOutboxRepository,
+)
+from app.webhooks import (
+    DeliveryResult,
+    WebhookDelivery,
+    build_headers,
+    build_payload,
+    get_client,
+    get_dispatcher,
+    run_async,
+)
 
 # Импорт для уведомлений
 try:
@@ -16,6 +30,30 @@ except ImportError:
     send_slack_notification = None
 
 
+def webhook_retry_countdown(retries: int) -> int:
+    """Задержка перед повторной отправкой: 1, 2, 4 минуты"""
+    return 60 * (2**retries)
+
+
+def enqueue_webhooks(deliveries: Sequence[Tuple[int, int]]) -> None:
+    """Поставить отправку вебхуков (project_id, lead_id) в очередь
+
+    В режиме "async" заявки отправляются пачками через dispatch_webhooks,
+    иначе - отдельной задачей send_webhook на каждую заявку.
+    """
+    if settings.webhook_dispatch_mode == "async":
+        size = max(settings.webhook_dispatch_batch_size, 1)
+        for start in range(0, len(deliveries), size):
+            batch = [
+                [project_id, lead_id, 1]
+                for project_id, lead_id in deliveries[start : start + size]
+            ]
+            dispatch_webhooks.delay(batch)
+    else:
+        for project_id, lead_id in deliveries:
+            send_webhook.delay(project_id, lead_id)
+
+
 @celery_app.task(bind=True, max_retries=3)
 def send_webhook(self, project_id: int, lead_id: int):
     """Асинхронная отправка вебхука"""
@@ -32,71 +70,41 @@ def send_webhook(self, project_id: int, lead_id: int):
         if not project.webhook_url:
             return {"status": "skipped", "reason": "Webhook URL не настроен"}
 
-        # Формируем payload
-        payload = {
-            "id": lead.id,
-            "project_id": project.id,
-            "name": lead.name,
-            "phone": lead.phone,
-            "email": lead.email,
-            "message": lead.message,
-            "status": lead.status,
-            "priority": lead.priority,
-            "utm": {
-                "source": lead.utm_source,
-                "medium": lead.utm_medium,
-                "campaign": lead.utm_campaign,
-                "term": lead.utm_term,
-                "content": lead.utm_content,
-            },
-            "custom_fields": lead.custom_fields,
-            "created_at": lead.created_at.isoformat(),
-            "updated_at": lead.updated_at.isoformat() if lead.updated_at else None,
-        }
-
-        # Отправляем вебхук
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "QuickLead-Manager/1.0",
-        }
-
-        # Добавляем кастомные заголовки если есть
-        if project.webhook_headers:
-            headers.update(project.webhook_headers)
+        # Формируем payload и заголовки
+        payload = build_payload(project, lead)
+        headers = build_headers(project)
 
         # Логируем попытку отправки
         webhook_log = WebhookLog(
             project_id=project_id,
             lead_id=lead_id,
             webhook_url=project.webhook_url,
-            payload=payload,
+            payload_hash=WebhookLogRepository.store_payload(db, payload),
             attempt=self.request.retries + 1,
         )
 
-        with httpx.Client(timeout=settings.webhook_timeout) as client:
-            response = client.post(project.webhook_url, json=payload, headers=headers)
+        # Клиент процесса переиспользует подключения к получателю
+        response = get_client().post(project.webhook_url, json=payload, headers=headers)
 
-            # Записываем результат
-            webhook_log.response_status = response.status_code
-            webhook_log.response_body = response.text
-            webhook_log.is_success = 200 <= response.status_code < 300
+        # Записываем результат
+        webhook_log.response_status = response.status_code
+        webhook_log.response_body = response.text
+        webhook_log.is_success = 200 <= response.status_code < 300
 
-            if not webhook_log.is_success:
-                webhook_log.error_message = (
-                    f"HTTP {response.status_code}: {response.text}"
-                )
+        if not webhook_log.is_success:
+            webhook_log.error_message = f"HTTP {response.status_code}: {response.text}"
 
-                # Повторная попытка
-                raise Exception(f"Webhook failed with status {response.status_code}")
+            # Повторная попытка
+            raise Exception(f"Webhook failed with status {response.status_code}")
 
-            db.add(webhook_log)
-            db.commit()
+        db.add(webhook_log)
+        db.commit()
 
-            return {
-                "status": "success",
-                "response_status": response.status_code,
-                "attempt": self.request.retries + 1,
-            }
+        return {
+            "status": "success",
+            "response_status": response.status_code,
+            "attempt": self.request.retries + 1,
+        }
 
     except Exception as exc:
         # Логируем ошибку
@@ -104,7 +112,9 @@ def send_webhook(self, project_id: int, lead_id: int):
             project_id=project_id,
             lead_id=lead_id,
             webhook_url=project.webhook_url if project else "unknown",
-            payload=payload if "payload" in locals() else {},
+            payload_hash=WebhookLogRepository.store_payload(
+                db, payload if "payload" in locals() else {}
+            ),
             error_message=str(exc),
             attempt=self.request.retries + 1,
             is_success=False,
@@ -115,7 +125,7 @@ def send_webhook(self, project_id: int, lead_id: int):
         # Повторная попытка с экспоненциальной задержкой
         raise self.retry(
             exc=exc,
-            countdown=60 * (2**self.request.retries),  # 1, 2, 4 минуты
+            countdown=webhook_retry_countdown(self.request.retries),
             max_retries=settings.webhook_retry_attempts,
         )
 
@@ -123,6 +133,275 @@ def send_webhook(self, project_id: int, lead_id: int):
         db.close()
 
 
+@celery_app.task
+def dispatch_webhooks(deliveries: List[List[int]]):
+    """Пакетная отправка вебхуков в event loop воркера
+
+    deliveries - список [project_id, lead_id, attempt]. Запросы идут
+    конкурентно с ограничением на хост и общим лимитом процесса воркера
+    (get_dispatcher), на каждую попытку пишется WebhookLog, как в
+    send_webhook. Неудачные отправки повторяются с той же задержкой и
+    тем же числом попыток.
+    """
+    db = SessionLocal()
+    try:
+        project_ids = {project_id for project_id, _, _ in deliveries}
+        lead_ids = {lead_id for _, lead_id, _ in deliveries}
+        projects = {
+            project.id: project
+            for project in db.scalars(
+                select(Project).where(Project.id.in_(project_ids))
+            )
+        }
+        leads = {
+            lead.id: lead
+            for lead in db.scalars(select(Lead).where(Lead.id.in_(lead_ids)))
+        }
+
+        jobs = []
+        missing = []
+        skipped = 0
+        for project_id, lead_id, attempt in deliveries:
+            project = projects.get(project_id)
+            lead = leads.get(lead_id)
+            if not project or not lead:
+                # Как в send_webhook: неудачная попытка с повтором
+                delivery = WebhookDelivery(
+                    project_id=project_id,
+                    lead_id=lead_id,
+                    url=(project.webhook_url if project else None) or "unknown",
+                    payload={},
+                    headers={},
+                    attempt=attempt,
+                )
+                missing.append(
+                    DeliveryResult(
+                        delivery,
+                        error_message=(
+                            f"Проект {project_id} или заявка {lead_id} не найдены"
+                        ),
+                    )
+                )
+                continue
+            if not project.webhook_url:
+                skipped += 1
+                continue
+            jobs.append(
+                WebhookDelivery(
+                    project_id=project_id,
+                    lead_id=lead_id,
+                    url=project.webhook_url,
+                    payload=build_payload(project, lead),
+                    headers=build_headers(project),
+                    attempt=attempt,
+                )
+            )
+
+        results = run_async(get_dispatcher().deliver_all(jobs)) if jobs else []
+        results.extend(missing)
+
+        retries = defaultdict(list)
+        for result in results:
+            delivery = result.delivery
+            db.add(
+                WebhookLog(
+                    project_id=delivery.project_id,
+                    lead_id=delivery.lead_id,
+                    webhook_url=delivery.url,
+                    payload_hash=WebhookLogRepository.store_payload(
+                        db, delivery.payload
+                    ),
+                    response_status=result.response_status,
+                    response_body=result.response_body,
+                    error_message=result.error_message,
+                    attempt=delivery.attempt,
+                    is_success=result.is_success,
+                )
+            )
+            if not result.is_success and delivery.attempt <= (
+                settings.webhook_retry_attempts
+            ):
+                retries[delivery.attempt].append(
+                    [delivery.project_id, delivery.lead_id, delivery.attempt + 1]
+                )
+        db.commit()
+
+        # Повторная попытка с экспоненциальной задержкой
+        for attempt, batch in retries.items():
+            dispatch_webhooks.apply_async(
+                args=[batch], countdown=webhook_retry_countdown(attempt - 1)
+            )
+
+        succeeded = sum(1 for result in results if result.is_success)
+        return {
+            "sent": succeeded,
+            "failed": len(results) - succeeded,
+            "retrying": sum(len(batch) for batch in retries.values()),
+            "skipped": skipped,
+        }
+    finally:
+        db.close()
+
+
+def _split_outbox_events(
+    events: List[WebhookOutbox], projects: Dict[int, Project]
+) -> Tuple[List[Tuple[int, int]], List[Tuple[int, List[int]]], List[int]]:
+    """Разделить события на одиночные отправки и пакеты
+
+    У проектов с webhook_batch_size > 1 полные пакеты отправляются сразу,
+    а неполный - только когда его старейшее событие ждет дольше
+    webhook_batch_window_ms, иначе события остаются до следующего запуска.
+    Возвращает (одиночные (project_id, lead_id), пакеты (project_id,
+    [lead_id]), id переданных событий).
+    """
+    now = datetime.now(timezone.utc)
+    singles, batches, done = [], [], []
+    by_project = defaultdict(list)
+    for event in events:
+        project = projects.get(event.project_id)
+        if project is None or project.webhook_batch_size <= 1:
+            singles.append((event.project_id, event.lead_id))
+            done.append(event.id)
+        else:
+            by_project[event.project_id].append(event)
+
+    for project_id, project_events in by_project.items():
+        project = projects[project_id]
+        size = project.webhook_batch_size
+        window = timedelta(milliseconds=project.webhook_batch_window_ms)
+        for start in range(0, len(project_events), size):
+            chunk = project_events[start : start + size]
+            oldest = chunk[0].created_at
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            if len(chunk) < size and now - oldest < window:
+                continue
+            batches.append((project_id, [event.lead_id for event in chunk]))
+            done.extend(event.id for event in chunk)
+    return singles, batches, done
+
+
+@celery_app.task(bind=True, max_retries=3)
+def send_webhook_batch(self, project_id: int, lead_ids: List[int]):
+    """Пакетная отправка вебхука: заявки проекта массивом в одном POST
+
+    На каждую попытку пишется один WebhookLog с результатом по каждой
+    заявке пакета в lead_results. Успех определяется ответом на весь
+    пакет, а не по заявкам: отправленные заявки получают is_success
+    пакета. Заявки, удаленные до отправки, в payload не попадают и
+    записываются как неудачные с error. Повторы и задержки - как у
+    send_webhook.
+    """
+    db = SessionLocal()
+    try:
+        project = db.scalar(select(Project).where(Project.id == project_id))
+        if not project or not project.webhook_url:
+            return {"status": "skipped", "reason": "Webhook URL не настроен"}
+
+        leads = list(
+            db.scalars(
+                select(Lead).where(Lead.id.in_(lead_ids)).order_by(Lead.id)
+            ).all()
+        )
+        found = {lead.id for lead in leads}
+        missing = [lead_id for lead_id in lead_ids if lead_id not in found]
+        payload = [build_payload(project, lead) for lead in leads]
+
+        webhook_log = WebhookLog(
+            project_id=project_id,
+            webhook_url=project.webhook_url,
+            payload_hash=WebhookLogRepository.store_payload(db, payload),
+            attempt=self.request.retries + 1,
+        )
+        if not leads:
+            webhook_log.error_message = "Заявки не найдены"
+        else:
+            try:
+                response = get_client().post(
+                    project.webhook_url, json=payload, headers=build_headers(project)
+                )
+            except Exception as exc:
+                webhook_log.error_message = str(exc) or type(exc).__name__
+            else:
+                webhook_log.response_status = response.status_code
+                webhook_log.response_body = response.text
+                webhook_log.is_success = 200 <= response.status_code < 300
+                if not webhook_log.is_success:
+                    webhook_log.error_message = (
+                        f"HTTP {response.status_code}: {response.text}"
+                    )
+
+        webhook_log.is_success = bool(webhook_log.is_success)
+        webhook_log.lead_results = [
+            {"lead_id": lead.id, "is_success": webhook_log.is_success} for lead in leads
+        ] + [
+            {"lead_id": lead_id, "is_success": False, "error": "Заявка не найдена"}
+            for lead_id in missing
+        ]
+        db.add(webhook_log)
+        db.commit()
+
+        if not webhook_log.is_success:
+            # Повторная попытка с экспоненциальной задержкой
+            raise self.retry(
+                exc=Exception(webhook_log.error_message),
+                countdown=webhook_retry_countdown(self.request.retries),
+                max_retries=settings.webhook_retry_attempts,
+            )
+
+        return {
+            "status": "success",
+            "response_status": webhook_log.response_status,
+            "leads": len(leads),
+            "missing": len(missing),
+            "attempt": self.request.retries + 1,
+        }
+    finally:
+        db.close()
+
+
+@celery_app.task
+def relay_webhook_outbox():
+    """Передать события из webhook_outbox в очередь отправки
+
+    События удаляются в той же транзакции после постановки задач в
+    брокер. Если брокер недоступен, события остаются и будут переданы
+    при следующем запуске, поэтому доставка - "как минимум один раз".
+    """
+    db = SessionLocal()
+    relayed = 0
+    last_id = 0
+    try:
+        for _ in range(max(settings.webhook_outbox_max_batches, 1)):
+            events = WebhookOutboxRepository.claim(
+                db, settings.webhook_outbox_batch_size, after_id=last_id
+            )
+            if not events:
+                break
+            last_id = events[-1].id
+
+            project_ids = {event.project_id for event in events}
+            projects = {
+                project.id: project
+                for project in db.scalars(
+                    select(Project).where(Project.id.in_(project_ids))
+                )
+            }
+            singles, batches, done = _split_outbox_events(events, projects)
+            enqueue_webhooks(singles)
+            for project_id, lead_ids in batches:
+                send_webhook_batch.delay(project_id, lead_ids)
+            WebhookOutboxRepository.delete(db, done)
+            db.commit()
+            relayed += len(done)
+        return {"relayed": relayed}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
 @celery_app.task
 def send_telegram_notification_task(lead_id: int, message: str):
     """Отправка уведомления в Telegram"""
@@ -198,9 +477,7 @@ def cleanup_old_webhook_logs(days: int = 30):
     try:
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
 
-        stmt = delete(WebhookLog).where(WebhookLog.created_at < cutoff_date)
-        result = db.execute(stmt)
-        deleted_count = result.rowcount
+        deleted_count = WebhookLogRepository.delete_older_than(db, cutoff_date)
 
         db.commit()
 
@@ -0,0 +1,247 @@
+"""HTTP клиент для отправки вебхуков"""
+
+import asyncio
+import importlib.util
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.config import settings
+from app.models import Lead, Project
+
+# Клиенты, event loop и ограничители отправок живут все время работы
+# процесса воркера
+_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_dispatcher: Optional["WebhookDispatcher"] = None
+
+
+def build_payload(project: Project, lead: Lead) -> Dict[str, Any]:
+    """Тело вебхука для заявки"""
+    return {
+        "id": lead.id,
+        "project_id": project.id,
+        "name": lead.name,
+        "phone": lead.phone,
+        "email": lead.email,
+        "message": lead.message,
+        "status": lead.status,
+        "priority": lead.priority,
+        "utm": {
+            "source": lead.utm_source,
+            "medium": lead.utm_medium,
+            "campaign": lead.utm_campaign,
+            "term": lead.utm_term,
+            "content": lead.utm_content,
+        },
+        "custom_fields": lead.custom_fields,
+        "created_at": lead.created_at.isoformat(),
+        "updated_at": lead.updated_at.isoformat() if lead.updated_at else None,
+    }
+
+
+def build_headers(project: Project) -> Dict[str, str]:
+    """Заголовки вебхука с кастомными заголовками проекта"""
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "QuickLead-Manager/1.0",
+    }
+    if project.webhook_headers:
+        headers.update(project.webhook_headers)
+    return headers
+
+
+def http2_available() -> bool:
+    """Можно ли использовать HTTP/2 (установлен пакет h2)"""
+    return settings.webhook_http2 and importlib.util.find_spec("h2") is not None
+
+
+def webhook_limits() -> httpx.Limits:
+    """Ограничения пула подключений к получателям вебхуков"""
+    return httpx.Limits(
+        max_connections=settings.webhook_max_connections,
+        max_keepalive_connections=settings.webhook_max_keepalive_connections,
+        keepalive_expiry=settings.webhook_keepalive_expiry,
+    )
+
+
+def create_client() -> httpx.Client:
+    """Создать клиент с keep-alive подключениями"""
+    return httpx.Client(
+        timeout=settings.webhook_timeout,
+        limits=webhook_limits(),
+        http2=http2_available(),
+    )
+
+
+def get_client() -> httpx.Client:
+    """Клиент текущего процесса
+
+    В воркере создается по сигналу worker_process_init, в остальных
+    случаях (solo пул, eager задачи) - при первом обращении.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+def close_client() -> None:
+    """Закрыть подключения клиентов текущего процесса"""
+    global _client, _async_client, _loop, _dispatcher
+    if _client is not None:
+        _client.close()
+        _client = None
+    if _loop is not None and not _loop.is_closed():
+        if _async_client is not None:
+            _loop.run_until_complete(_async_client.aclose())
+        _loop.close()
+    _async_client = None
+    _loop = None
+    # Семафоры привязаны к закрытому loop
+    _dispatcher = None
+
+
+def run_async(coro):
+    """Выполнить корутину в event loop процесса
+
+    Loop не пересоздается между задачами, поэтому асинхронный клиент
+    сохраняет подключения к получателям.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Асинхронный клиент процесса (вызывается внутри run_async)"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=settings.webhook_timeout,
+            limits=webhook_limits(),
+            http2=http2_available(),
+        )
+    return _async_client
+
+
+@dataclass
+class WebhookDelivery:
+    """Отправка вебхука по одной заявке"""
+
+    project_id: int
+    lead_id: int
+    url: str
+    payload: Dict[str, Any]
+    headers: Dict[str, str]
+    attempt: int = 1
+
+
+@dataclass
+class DeliveryResult:
+    """Результат отправки вебхука"""
+
+    delivery: WebhookDelivery
+    response_status: Optional[int] = None
+    response_body: Optional[str] = None
+    error_message: Optional[str] = None
+
+    @property
+    def is_success(self) -> bool:
+        return self.response_status is not None and 200 <= self.response_status < 300
+
+
+class WebhookDispatcher:
+    """Конкурентная отправка вебхуков с ограничениями
+
+    Одновременно выполняется не больше max_in_flight запросов и не больше
+    max_in_flight_per_host запросов к одному хосту: медленный получатель
+    занимает только свои слоты. Слот хоста берется раньше общего, поэтому
+    ожидающие своего хоста отправки не держат общие слоты.
+
+    Лимиты действуют в пределах объекта: у диспетчера процесса
+    (get_dispatcher) - на все пакеты процесса воркера, но не между
+    процессами. При N процессах к одному хосту идет до
+    N * max_in_flight_per_host запросов.
+    """
+
+    def __init__(self, max_in_flight: int, max_in_flight_per_host: int):
+        self.max_in_flight = max(max_in_flight, 1)
+        self.max_in_flight_per_host = max(max_in_flight_per_host, 1)
+        self.in_flight = asyncio.Semaphore(self.max_in_flight)
+        self.per_host: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.max_in_flight_per_host)
+        )
+
+    async def deliver_all(
+        self, deliveries: List[WebhookDelivery]
+    ) -> List[DeliveryResult]:
+        """Отправить вебхуки, результаты в порядке deliveries
+
+        Результаты возвращаются, когда завершены все отправки пакета:
+        медленный получатель задерживает запись логов и повторов всего
+        пакета (не дольше webhook_timeout на запрос плюс ожидание слотов),
+        поэтому размер пакета ограничен webhook_dispatch_batch_size.
+        """
+        client = get_async_client()
+
+        async def deliver(delivery: WebhookDelivery) -> DeliveryResult:
+            try:
+                host = httpx.URL(delivery.url).host
+                async with self.per_host[host], self.in_flight:
+                    response = await client.post(
+                        delivery.url, json=delivery.payload, headers=delivery.headers
+                    )
+            except Exception as exc:
+                return DeliveryResult(
+                    delivery, error_message=str(exc) or type(exc).__name__
+                )
+
+            result = DeliveryResult(
+                delivery,
+                response_status=response.status_code,
+                response_body=response.text,
+            )
+            if not result.is_success:
+                result.error_message = f"HTTP {response.status_code}: {response.text}"
+            return result
+
+        return await asyncio.gather(*(deliver(delivery) for delivery in deliveries))
+
+
+def get_dispatcher() -> WebhookDispatcher:
+    """Диспетчер процесса
+
+    Один на процесс, как и асинхронный клиент: лимиты
+    webhook_max_in_flight и webhook_max_in_flight_per_host действуют на
+    процесс воркера целиком, а не на отдельный пакет.
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = WebhookDispatcher(
+            max_in_flight=settings.webhook_max_in_flight,
+            max_in_flight_per_host=settings.webhook_max_in_flight_per_host,
+        )
+    return _dispatcher
+
+
+@worker_process_init.connect
+def open_worker_client(**kwargs) -> None:
+    """Открыть клиент в дочернем процессе воркера
+
+    Подключения не переживают fork, поэтому клиент создается заново
+    в каждом процессе.
+    """
+    global _client
+    _client = create_client()
+
+
+@worker_process_shutdown.connect
+def close_worker_client(**kwargs) -> None:
+    """Закрыть клиент при остановке процесса воркера"""
+    close_client()
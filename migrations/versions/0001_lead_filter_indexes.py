@@ -0,0 +1,39 @@
+"""Индексы под фильтры заявок, историю, комментарии и логи вебхуков
+
+Таблицы создаются через Base.metadata.create_all при старте приложения,
+поэтому миграция только добавляет индексы и пропускает уже существующие.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_leads_project_id_created_at", "leads", ["project_id", "created_at"]),
+    ("ix_leads_project_id_status", "leads", ["project_id", "status"]),
+    ("ix_leads_project_id_priority", "leads", ["project_id", "priority"]),
+    ("ix_leads_assigned_to_status", "leads", ["assigned_to", "status"]),
+    ("ix_leads_created_at", "leads", ["created_at"]),
+    ("ix_lead_status_history_lead_id", "lead_status_history", ["lead_id"]),
+    ("ix_lead_comments_lead_id", "lead_comments", ["lead_id"]),
+    ("ix_webhook_logs_created_at", "webhook_logs", ["created_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,72 @@
+"""Поисковый индекс заявок: FTS5 в SQLite, trigram индексы в PostgreSQL
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+import re
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TEXT_SQL = (
+    "(coalesce(name, '') || ' ' || coalesce(email, '') || ' ' "
+    "|| coalesce(message, ''))"
+)
+SEARCH_PHONE_SQL = "regexp_replace(coalesce(phone, ''), '\\D', '', 'g')"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts "
+            "USING fts5(name, phone, email, message, tokenize='trigram')"
+        )
+        op.execute("DELETE FROM leads_fts")
+        rows = bind.execute(
+            sa.text("SELECT id, name, phone, email, message FROM leads")
+        ).fetchall()
+        if rows:
+            bind.execute(
+                sa.text(
+                    "INSERT INTO leads_fts (rowid, name, phone, email, message) "
+                    "VALUES (:id, :name, :phone, :email, :message)"
+                ),
+                [
+                    {
+                        "id": row.id,
+                        "name": row.name,
+                        "phone": re.sub(r"\D", "", row.phone or ""),
+                        "email": row.email,
+                        "message": row.message,
+                    }
+                    for row in rows
+                ],
+            )
+    elif bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_leads_search_text ON leads "
+            f"USING gin ({SEARCH_TEXT_SQL} gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_leads_search_phone ON leads "
+            f"USING gin (({SEARCH_PHONE_SQL}) gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS leads_fts")
+    elif bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_leads_search_phone")
+        op.execute("DROP INDEX IF EXISTS ix_leads_search_text")
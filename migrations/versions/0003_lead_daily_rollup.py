@@ -0,0 +1,59 @@
+"""Счетчики заявок по проекту, дню и статусу для статистики дашборда
+
+Таблица может быть уже создана через Base.metadata.create_all при старте
+приложения, поэтому счетчики в любом случае пересчитываются по заявкам.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEAD_STATUSES = ("NEW", "IN_PROGRESS", "CALLBACK", "SUCCESS", "FAILED")
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # Тип уже создан вместе с таблицей leads
+        status_type = postgresql.ENUM(
+            *LEAD_STATUSES, name="leadstatus", create_type=False
+        )
+        # День в UTC, как у счетчиков приложения (lead_day)
+        day = "date(timezone('UTC', created_at))"
+    else:
+        status_type = sa.Enum(*LEAD_STATUSES, name="leadstatus")
+        day = "date(created_at)"
+
+    op.create_table(
+        "lead_daily_rollup",
+        sa.Column(
+            "project_id",
+            sa.Integer(),
+            sa.ForeignKey("projects.id"),
+            primary_key=True,
+        ),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("status", status_type, primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.execute("DELETE FROM lead_daily_rollup")
+    op.execute(
+        "INSERT INTO lead_daily_rollup (project_id, day, status, count) "
+        f"SELECT project_id, {day}, status, count(id) FROM leads "
+        f"GROUP BY project_id, {day}, status"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("lead_daily_rollup", if_exists=True)
@@ -0,0 +1,61 @@
+"""Пакетная отправка вебхуков: настройки проекта и результаты по заявкам
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns(table: str) -> dict:
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"]: column for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    project_columns = _columns("projects")
+    with op.batch_alter_table("projects") as batch_op:
+        if "webhook_batch_size" not in project_columns:
+            batch_op.add_column(
+                sa.Column(
+                    "webhook_batch_size",
+                    sa.Integer(),
+                    server_default="1",
+                    nullable=False,
+                )
+            )
+        if "webhook_batch_window_ms" not in project_columns:
+            batch_op.add_column(
+                sa.Column(
+                    "webhook_batch_window_ms",
+                    sa.Integer(),
+                    server_default="0",
+                    nullable=False,
+                )
+            )
+
+    log_columns = _columns("webhook_logs")
+    with op.batch_alter_table("webhook_logs") as batch_op:
+        if "lead_results" not in log_columns:
+            batch_op.add_column(sa.Column("lead_results", sa.JSON(), nullable=True))
+        if not log_columns["lead_id"]["nullable"]:
+            batch_op.alter_column("lead_id", existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM webhook_logs WHERE lead_id IS NULL")
+    with op.batch_alter_table("webhook_logs") as batch_op:
+        batch_op.alter_column("lead_id", existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_column("lead_results")
+    with op.batch_alter_table("projects") as batch_op:
+        batch_op.drop_column("webhook_batch_window_ms")
+        batch_op.drop_column("webhook_batch_size")
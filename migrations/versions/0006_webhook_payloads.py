@@ -0,0 +1,80 @@
+"""Компактное хранение логов вебхуков: общая таблица payload
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+import zlib
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns(table: str) -> dict:
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"]: column for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_payloads",
+        sa.Column("hash", sa.String(length=64), nullable=False),
+        sa.Column("encoding", sa.String(length=16), nullable=False),
+        sa.Column("body", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("hash"),
+        if_not_exists=True,
+    )
+
+    log_columns = _columns("webhook_logs")
+    with op.batch_alter_table("webhook_logs") as batch_op:
+        if "payload_hash" not in log_columns:
+            batch_op.add_column(
+                sa.Column("payload_hash", sa.String(length=64), nullable=True)
+            )
+        if not log_columns["payload"]["nullable"]:
+            batch_op.alter_column("payload", existing_type=sa.JSON(), nullable=True)
+    op.create_index(
+        "ix_webhook_logs_payload_hash",
+        "webhook_logs",
+        ["payload_hash"],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    # Вернуть payload в строки лога, которые хранят только ссылку
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(
+            "SELECT l.id, p.encoding, p.body FROM webhook_logs l "
+            "JOIN webhook_payloads p ON p.hash = l.payload_hash "
+            "WHERE l.payload IS NULL"
+        )
+    ).fetchall()
+    for log_id, encoding, body in rows:
+        if encoding == "zlib":
+            body = zlib.decompress(body)
+        bind.execute(
+            sa.text("UPDATE webhook_logs SET payload = :payload WHERE id = :id"),
+            {"payload": body.decode(), "id": log_id},
+        )
+    op.execute("UPDATE webhook_logs SET payload = '{}' WHERE payload IS NULL")
+
+    op.drop_index("ix_webhook_logs_payload_hash", table_name="webhook_logs")
+    with op.batch_alter_table("webhook_logs") as batch_op:
+        batch_op.alter_column("payload", existing_type=sa.JSON(), nullable=False)
+        batch_op.drop_column("payload_hash")
+    op.drop_table("webhook_payloads")
@@ -0,0 +1,34 @@
+"""Версия заявки для оптимистичной блокировки
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _columns(table: str) -> dict:
+    inspector = sa.inspect(op.get_bind())
+    return {column["name"]: column for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    if "version" not in _columns("leads"):
+        with op.batch_alter_table("leads") as batch_op:
+            batch_op.add_column(
+                sa.Column("version", sa.Integer(), server_default="1", nullable=False)
+            )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("leads") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,35 @@
+"""Единый формат leads.created_at в SQLite для keyset-пагинации
+
+Заявки, созданные до перехода на время приложения, записаны через
+CURRENT_TIMESTAMP ('YYYY-MM-DD HH:MM:SS') без микросекунд. SQLite
+сравнивает даты как строки, поэтому курсор в формате SQLAlchemy
+('... HH:MM:SS.ffffff') не совпадал с такими строками и страница
+повторялась. Старые значения дополняются до формата SQLAlchemy.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        "UPDATE leads SET created_at = created_at || '.000000' "
+        "WHERE length(created_at) = 19"
+    )
+
+
+def downgrade() -> None:
+    # Значения в формате SQLAlchemy читаются и старым кодом
+    pass
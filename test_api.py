@@ -136,8 +136,33 @@ def test_api():
     except Exception as e:
         print(f"❌ Ошибка: {e}")
 
-    # 7. Получение статистики
-    print("\n7. Получение статистики...")
+    # 7. Пагинация по курсору: каждая заявка встречается один раз,
+    # в том числе старые заявки с created_at без микросекунд
+    print("\n7. Пагинация по курсору...")
+    try:
+        seen = []
+        params = {"limit": 1}
+        while True:
+            response = requests.get(
+                f"{BASE_URL}/api/leads/page", headers=headers, params=params
+            )
+            if response.status_code != 200:
+                print(f"❌ Ошибка получения страницы: {response.status_code}")
+                break
+            page = response.json()
+            seen.extend(item["id"] for item in page["items"])
+            if len(seen) != len(set(seen)):
+                print(f"❌ Заявка повторилась на следующей странице: {seen[-1]}")
+                break
+            if not page["next_cursor"]:
+                print(f"✅ Пройдено страниц: {len(seen)}, повторов нет")
+                break
+            params = {"limit": 1, "cursor": page["next_cursor"]}
+    except Exception as e:
+        print(f"❌ Ошибка: {e}")
+
+    # 8. Получение статистики
+    print("\n8. Получение статистики...")
     try:
         response = requests.get(
             f"{BASE_URL}/api/leads/stats/dashboard", headers=headers
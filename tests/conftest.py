@@ -0,0 +1,89 @@
+"""Общие фикстуры: приложение на временной базе SQLite"""
+
+import os
+import sqlite3
+import tempfile
+import uuid
+
+# Настройки читаются при импорте app, поэтому база задается до него
+TEST_DIR = tempfile.mkdtemp(prefix="qlm-tests-")
+TEST_DB_PATH = os.path.join(TEST_DIR, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+os.environ.pop("DATABASE_READ_URL", None)
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    response = client.post(
+        "/api/auth/login", params={"username": "admin", "password": "admin123"}
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def project(client, admin_headers):
+    """Новый проект на каждый тест, чтобы счетчики тестов не смешивались"""
+    response = client.post(
+        "/api/projects/",
+        json={"name": f"Тест {uuid.uuid4().hex[:8]}"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.fixture
+def create_lead(client, project):
+    """Создать заявку через внешний API проекта"""
+
+    def create(**fields):
+        response = client.post(
+            "/api/v1/lead",
+            json={"name": "Иван", **fields},
+            headers={"X-API-Key": project["api_key"]},
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    return create
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def database_snapshot():
+    """Сделать согласованную копию тестовой базы (с учетом WAL), вернуть путь"""
+
+    def snapshot() -> str:
+        path = os.path.join(TEST_DIR, f"snapshot-{uuid.uuid4().hex[:8]}.db")
+        source = sqlite3.connect(TEST_DB_PATH)
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        return path
+
+    return snapshot
@@ -0,0 +1,87 @@
+"""Версии заявок: ETag, If-Match, 412"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+
+
+def get_etag(client, headers, lead_id):
+    response = client.get(f"/api/leads/{lead_id}", headers=headers)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_if_match_with_current_etag_updates(client, admin_headers, create_lead):
+    lead = create_lead()
+    etag = get_etag(client, admin_headers, lead["id"])
+
+    response = client.put(
+        f"/api/leads/{lead['id']}",
+        json={"priority": 2},
+        headers={**admin_headers, "If-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    stale = client.put(
+        f"/api/leads/{lead['id']}",
+        json={"priority": 3},
+        headers={**admin_headers, "If-Match": etag},
+    )
+    assert stale.status_code == 412
+
+
+def test_weak_etag_does_not_match(client, admin_headers, create_lead):
+    lead = create_lead()
+    etag = get_etag(client, admin_headers, lead["id"])
+
+    response = client.put(
+        f"/api/leads/{lead['id']}",
+        json={"priority": 2},
+        headers={**admin_headers, "If-Match": f"W/{etag}"},
+    )
+    assert response.status_code == 412
+
+    response = client.put(
+        f"/api/leads/{lead['id']}/status",
+        params={"new_status": "success"},
+        headers={**admin_headers, "If-Match": f"W/{etag}"},
+    )
+    assert response.status_code == 412
+
+    response = client.put(
+        f"/api/leads/{lead['id']}",
+        json={"priority": 2},
+        headers={**admin_headers, "If-Match": "*"},
+    )
+    assert response.status_code == 200
+
+
+def test_etag_is_read_from_primary_under_replica_lag(
+    client, admin_headers, create_lead, database_snapshot, monkeypatch
+):
+    """GET -> PUT не дает 412, даже если реплика отстает"""
+    lead = create_lead()
+    replica_path = database_snapshot()
+    replica = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=create_engine(f"sqlite:///{replica_path}"),
+    )
+    monkeypatch.setattr(database, "ReadSessionLocal", replica)
+
+    # Изменение есть только на основной базе
+    response = client.put(
+        f"/api/leads/{lead['id']}", json={"priority": 4}, headers=admin_headers
+    )
+    assert response.status_code == 200
+
+    etag = get_etag(client, admin_headers, lead["id"])
+    assert etag == response.headers["ETag"]
+    response = client.put(
+        f"/api/leads/{lead['id']}",
+        json={"priority": 5},
+        headers={**admin_headers, "If-Match": etag},
+    )
+    assert response.status_code == 200
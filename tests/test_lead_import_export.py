@@ -0,0 +1,110 @@
+"""Импорт заявок из файла и выгрузка в CSV/XLSX"""
+
+import csv
+import io
+
+from openpyxl import load_workbook
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.repositories.lead_repository import LeadRepository
+
+
+def import_csv(client, headers, project_id, text):
+    return client.post(
+        "/api/leads/import",
+        params={"project_id": project_id},
+        files={"file": ("leads.csv", text.encode())},
+        headers=headers,
+    )
+
+
+def project_leads(client, headers, project_id):
+    return client.get(
+        "/api/leads/", params={"project_id": project_id}, headers=headers
+    ).json()
+
+
+def test_import_reports_row_errors(client, admin_headers, project):
+    response = import_csv(
+        client,
+        admin_headers,
+        project["id"],
+        'name,email,custom_fields\nА,a@example.com,\nБ,не email,\nВ,,"{bad"\n',
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 1
+    assert result["failed"] == 2
+    assert [(error["row"], error["field"]) for error in result["errors"]] == [
+        (2, "email"),
+        (3, "custom_fields"),
+    ]
+    assert result["error"] is None
+
+
+def test_import_stops_on_failed_chunk(client, admin_headers, project, monkeypatch):
+    monkeypatch.setattr(settings, "lead_import_chunk_size", 2)
+    insert_leads = LeadRepository._insert_leads
+    calls = []
+
+    def failing_second_chunk(db, rows, notify):
+        calls.append(len(rows))
+        lead_ids = insert_leads(db, rows, notify)
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("disk I/O error"))
+        return lead_ids
+
+    monkeypatch.setattr(
+        LeadRepository, "_insert_leads", staticmethod(failing_second_chunk)
+    )
+    text = "name\n" + "".join(f"Пачка {index}\n" for index in range(6))
+    response = import_csv(client, admin_headers, project["id"], text)
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 2
+    assert "3" in result["error"]
+    # Сохранена только первая пачка, вторая откачена
+    names = {
+        lead["name"] for lead in project_leads(client, admin_headers, project["id"])
+    }
+    assert names == {"Пачка 0", "Пачка 1"}
+
+
+def test_export_neutralises_formulas(client, admin_headers, project, create_lead):
+    create_lead(
+        name='=HYPERLINK("http://example.com","x")',
+        phone="+7 912 555-01-99",
+        message="@SUM(A1)",
+    )
+    export = {"filters": {"project_id": project["id"]}}
+
+    response = client.post(
+        "/api/leads/export", json={**export, "format": "csv"}, headers=admin_headers
+    )
+    text = response.content.decode("utf-8-sig")
+    row = next(csv.DictReader(io.StringIO(text)))
+    assert row["name"] == '\'=HYPERLINK("http://example.com","x")'
+    assert row["phone"] == "'+7 912 555-01-99"
+    assert row["message"] == "'@SUM(A1)"
+
+    response = client.post(
+        "/api/leads/export", json={**export, "format": "xlsx"}, headers=admin_headers
+    )
+    sheet = load_workbook(io.BytesIO(response.content)).active
+    header, cells = list(sheet.iter_rows(min_row=1, max_row=2))
+    values = {column.value: cell for column, cell in zip(header, cells)}
+    assert values["name"].data_type == "s"
+    assert values["name"].value.startswith("'=")
+
+    # Выгрузка CSV импортируется обратно с исходными значениями
+    target = client.post(
+        "/api/projects/",
+        json={"name": f"{project['name']} копия"},
+        headers=admin_headers,
+    ).json()
+    assert import_csv(client, admin_headers, target["id"], text).json()["imported"] == 1
+    lead = project_leads(client, admin_headers, target["id"])[0]
+    assert lead["name"] == '=HYPERLINK("http://example.com","x")'
+    assert lead["message"] == "@SUM(A1)"
@@ -0,0 +1,66 @@
+"""Пакетная вставка заявок (ingest_leads / _insert_leads)"""
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.database import engine
+from app.models import Lead, LeadStatusHistory
+from app.repositories.lead_repository import LeadRepository
+from app.schemas import LeadCreate
+
+
+def make_items(project_id, names):
+    return [
+        (LeadCreate(project_id=project_id, name=name), None, None, None, False)
+        for name in names
+    ]
+
+
+def test_ingest_leads_returns_ids_of_own_rows(client, admin_headers, project, db):
+    names = [f"Пакет {project['id']}-{index}" for index in range(5)]
+    responses = LeadRepository.ingest_leads(db, make_items(project["id"], names))
+
+    assert [response.name for response in responses] == names
+    for response in responses:
+        assert db.get(Lead, response.id).name == response.name
+
+    # История и поисковый индекс привязаны к тем же заявкам
+    history = db.execute(
+        select(LeadStatusHistory.lead_id, func.count())
+        .where(LeadStatusHistory.lead_id.in_([r.id for r in responses]))
+        .group_by(LeadStatusHistory.lead_id)
+    ).all()
+    assert dict(history) == {response.id: 1 for response in responses}
+
+    found = client.get(
+        "/api/leads/", params={"search": names[3]}, headers=admin_headers
+    ).json()
+    assert [lead["id"] for lead in found] == [responses[3].id]
+
+
+def test_ingest_leads_rejects_foreign_row_in_id_block(project, db):
+    """Чужая строка между вставкой и чтением max(id) не путает id заявок"""
+    columns = [column.name for column in Lead.__table__.columns if column.name != "id"]
+    copy_last = (
+        f"INSERT INTO leads ({', '.join(columns)}) "
+        f"SELECT {', '.join(columns)} FROM leads ORDER BY id DESC LIMIT 1"
+    )
+
+    inserted = []
+
+    # Слушатель нельзя снять из него самого, поэтому срабатывает один раз
+    def insert_foreign_row(conn, cursor, statement, parameters, context, many):
+        if many and statement.startswith("INSERT INTO leads ") and not inserted:
+            inserted.append(True)
+            cursor.execute(copy_last)
+
+    event.listen(engine, "after_cursor_execute", insert_foreign_row)
+    names = [f"Чужой блок {project['id']}-{index}" for index in range(3)]
+    try:
+        with pytest.raises(RuntimeError, match="не образуют блок"):
+            LeadRepository.ingest_leads(db, make_items(project["id"], names))
+    finally:
+        event.remove(engine, "after_cursor_execute", insert_foreign_row)
+        db.rollback()
+
+    assert not db.scalars(select(Lead).where(Lead.name.in_(names))).all()
@@ -0,0 +1,48 @@
+"""Пагинация списка заявок по курсору"""
+
+from app.repositories.lead_repository import LeadRepository
+from app.schemas import LeadCreate
+
+
+def walk_pages(client, headers, project_id, limit):
+    ids = []
+    params = {"project_id": project_id, "limit": limit}
+    while True:
+        response = client.get("/api/leads/page", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        ids.extend(lead["id"] for lead in page["items"])
+        if not page["next_cursor"]:
+            return ids
+        params = {**params, "cursor": page["next_cursor"]}
+
+
+def test_pages_return_every_lead_once(client, admin_headers, project, create_lead, db):
+    created = [create_lead(name=f"Страница {index}")["id"] for index in range(3)]
+    # У заявок одной пачки одинаковый created_at, порядок решает id
+    batch = LeadRepository.ingest_leads(
+        db,
+        [
+            (
+                LeadCreate(project_id=project["id"], name=f"Пачка {index}"),
+                None,
+                None,
+                None,
+                False,
+            )
+            for index in range(4)
+        ],
+    )
+    created += [lead.id for lead in batch]
+
+    for limit in (1, 2, 3):
+        ids = walk_pages(client, admin_headers, project["id"], limit)
+        assert len(ids) == len(set(ids))
+        assert sorted(ids) == sorted(created)
+
+
+def test_bad_cursor_is_rejected(client, admin_headers):
+    response = client.get(
+        "/api/leads/page", params={"cursor": "не курсор"}, headers=admin_headers
+    )
+    assert response.status_code == 400
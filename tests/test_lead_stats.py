@@ -0,0 +1,99 @@
+"""Статистика дашборда: счетчики lead_daily_rollup и проход по заявкам"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.models import Lead
+from app.repositories.rollup_repository import LeadRollupRepository
+
+
+def dashboard(client, headers, project_id, monkeypatch, from_rollup):
+    monkeypatch.setattr(settings, "lead_stats_from_rollup", from_rollup)
+    response = client.get(
+        "/api/leads/stats/dashboard",
+        params={"project_id": project_id},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def assert_paths_agree(client, headers, project_id, monkeypatch):
+    rollup = dashboard(client, headers, project_id, monkeypatch, True)
+    scan = dashboard(client, headers, project_id, monkeypatch, False)
+    assert rollup == scan
+    return rollup
+
+
+def test_rollup_matches_scan_after_changes(
+    client, admin_headers, project, create_lead, monkeypatch
+):
+    leads = [create_lead(name=f"Статистика {index}") for index in range(4)]
+
+    client.put(
+        f"/api/leads/{leads[0]['id']}/status",
+        params={"new_status": "success"},
+        headers=admin_headers,
+    )
+    client.post(
+        "/api/leads/bulk-update",
+        json={"lead_ids": [leads[1]["id"], leads[2]["id"]], "status": "failed"},
+        headers=admin_headers,
+    )
+    client.post(
+        "/api/leads/import",
+        params={"project_id": project["id"]},
+        files={"file": ("leads.csv", "name\nИмпорт 1\nИмпорт 2\n")},
+        headers=admin_headers,
+    )
+    client.delete(f"/api/leads/{leads[3]['id']}", headers=admin_headers)
+
+    stats = assert_paths_agree(client, admin_headers, project["id"], monkeypatch)
+    assert stats["total_leads"] == 5
+    assert stats["leads_by_status"]["success"] == 1
+    assert stats["leads_by_status"]["failed"] == 2
+    assert stats["leads_today"] == 5
+
+
+@pytest.fixture
+def non_utc_host():
+    """Часовой пояс процесса, в котором сейчас другая дата, чем в UTC"""
+    previous = os.environ.get("TZ")
+    # Etc/GMT-14 - UTC+14, Etc/GMT+12 - UTC-12
+    hour = datetime.now(timezone.utc).hour
+    os.environ["TZ"] = "Etc/GMT-14" if hour >= 10 else "Etc/GMT+12"
+    time.tzset()
+    assert datetime.now().date() != datetime.now(timezone.utc).date()
+    yield
+    if previous is None:
+        os.environ.pop("TZ")
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+def test_stats_count_days_in_utc(
+    client, admin_headers, project, create_lead, db, monkeypatch, non_utc_host
+):
+    """Сегодня - по UTC, а не по локальной дате процесса
+
+    Вчерашняя по UTC заявка ловит локальную дату, отстающую от UTC,
+    сегодняшняя - опережающую.
+    """
+    create_lead()
+    yesterday = create_lead()
+    db.execute(
+        update(Lead)
+        .where(Lead.id == yesterday["id"])
+        .values(created_at=datetime.now(timezone.utc) - timedelta(days=1))
+    )
+    LeadRollupRepository.rebuild(db)
+
+    stats = assert_paths_agree(client, admin_headers, project["id"], monkeypatch)
+    assert stats["leads_today"] == 1
+    assert stats["leads_this_week"] == 2
@@ -0,0 +1,93 @@
+"""Задачи вебхуков: пакетная отправка и relay из webhook_outbox"""
+
+import json
+
+import httpx
+from sqlalchemy import select
+
+from app import tasks
+from app.models import WebhookLog, WebhookOutbox
+
+MISSING_LEAD_ID = 10**9
+
+
+def configure_webhook(client, headers, project, **fields):
+    response = client.put(
+        f"/api/projects/{project['id']}",
+        json={"webhook_url": "http://hooks.example.com/leads", **fields},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+
+def test_batch_records_missing_leads(
+    client, admin_headers, project, create_lead, db, monkeypatch
+):
+    lead = create_lead()
+    configure_webhook(client, admin_headers, project)
+    sent = []
+
+    def handler(request):
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, text="ok")
+
+    http = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(tasks, "get_client", lambda: http)
+
+    result = tasks.send_webhook_batch.apply(
+        args=[project["id"], [lead["id"], MISSING_LEAD_ID]]
+    ).get()
+
+    assert result["leads"] == 1
+    assert result["missing"] == 1
+    assert [item["id"] for item in sent[0]] == [lead["id"]]
+    log = db.scalar(
+        select(WebhookLog)
+        .where(WebhookLog.project_id == project["id"])
+        .order_by(WebhookLog.id.desc())
+    )
+    assert log.is_success
+    assert log.lead_results == [
+        {"lead_id": lead["id"], "is_success": True},
+        {"lead_id": MISSING_LEAD_ID, "is_success": False, "error": "Заявка не найдена"},
+    ]
+
+
+def test_relay_holds_partial_batch_until_window(
+    client, admin_headers, project, create_lead, db, monkeypatch
+):
+    configure_webhook(
+        client,
+        admin_headers,
+        project,
+        webhook_batch_size=3,
+        webhook_batch_window_ms=60000,
+    )
+    lead_ids = [create_lead()["id"] for _ in range(4)]
+    batches = []
+    monkeypatch.setattr(tasks, "enqueue_webhooks", lambda deliveries: None)
+    monkeypatch.setattr(
+        tasks.send_webhook_batch,
+        "delay",
+        lambda project_id, ids: batches.append((project_id, ids)),
+    )
+
+    def pending():
+        db.expire_all()
+        return list(
+            db.scalars(
+                select(WebhookOutbox.lead_id).where(
+                    WebhookOutbox.project_id == project["id"]
+                )
+            )
+        )
+
+    # Полный пакет уходит сразу, неполный ждет окна
+    tasks.relay_webhook_outbox.apply().get()
+    assert (project["id"], lead_ids[:3]) in batches
+    assert pending() == lead_ids[3:]
+
+    configure_webhook(client, admin_headers, project, webhook_batch_window_ms=0)
+    tasks.relay_webhook_outbox.apply().get()
+    assert (project["id"], lead_ids[3:]) in batches
+    assert pending() == []